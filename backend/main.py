@@ -7,15 +7,23 @@ from fastapi_cache import FastAPICache
 from fastapi_cache.backends.redis import RedisBackend
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.cors import CORSMiddleware
+from utils.conf import CACHE_L1_MAX_BYTES
+from utils.cache import bundle_key_builder, ORJsonCoder, TieredBackend
+from utils.responses import ORJSONBytesResponse
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     redis = aioredis.from_url("redis://localhost", encoding="utf8", decode_responses=False)
-    FastAPICache.init(RedisBackend(redis), prefix="fastapi-cache")
+    FastAPICache.init(
+        TieredBackend(RedisBackend(redis), CACHE_L1_MAX_BYTES),
+        prefix="fastapi-cache",
+        coder=ORJsonCoder,
+        key_builder=bundle_key_builder
+    )
     yield
 
-app = FastAPI(lifespan=lifespan)
-from routers import node, env, pod, pvc, resources, file_manager
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONBytesResponse)
+from routers import node, env, pod, pvc, resources, file_manager, cache, logs, relationships
 
 # Crucial: Allow React (port 5173 or 3000) to talk to Python
 app.add_middleware(
@@ -32,6 +40,9 @@ app.include_router(pod.router)
 app.include_router(pvc.router)
 app.include_router(resources.router)
 app.include_router(file_manager.router)
+app.include_router(cache.router)
+app.include_router(logs.router)
+app.include_router(relationships.router)
 
 # # For test
 # app.include_router(node.router, prefix="/api")
@@ -1,13 +1,11 @@
 # node.py
 
-import re
-import json
-import yaml
+import array
 
 from resources.resources import Resource
 
-from utils.tar_controller import TarController
 from utils.dict_utils import deep_get
+from utils.parsers import parse_node_resources, parse_quantity
 
 OS_LOGO_DICT = {
     "Amazon": "/home/admin/k8s-visualizer/frontend/src/assets/amazon_linux.png",
@@ -28,6 +26,29 @@ DEAFULT_RESOURCES = {
      
 }
 
+# Per node columns of /node/capacity: cpu in cores, memory in bytes.
+NODE_CAPACITY_COLUMNS = (
+    "cpu_capacity", "cpu_allocatable", "cpu_requests", "cpu_limits",
+    "memory_capacity", "memory_allocatable", "memory_requests", "memory_limits",
+    "pods_allocatable", "pods"
+)
+
+def to_gi(memory):
+    """Whole GiB of a memory quantity, whatever its unit (Ki, Mi, Gi, plain bytes, ...)."""
+    memory_bytes = parse_quantity(memory)
+    return "N/A" if memory_bytes is None else int(memory_bytes / (1024 ** 3))
+
+def summarize_capacity(totals):
+    """Adds the request ratio, overcommit (limits) ratio and headroom of cpu and memory to summed columns."""
+    summary = {column: int(value) if float(value).is_integer() else value for column, value in totals.items()}
+    for resource in ("cpu", "memory"):
+        allocatable = totals[f"{resource}_allocatable"]
+        requests = totals[f"{resource}_requests"]
+        summary[f"{resource}_requests_ratio"] = requests / allocatable if allocatable else None
+        summary[f"{resource}_limits_ratio"] = totals[f"{resource}_limits"] / allocatable if allocatable else None
+        summary[f"{resource}_headroom"] = summary[f"{resource}_allocatable"] - summary[f"{resource}_requests"]
+    return summary
+
 class NodeInfo(Resource):
     def __init__(self, file_name):
         super().__init__(file_name)
@@ -41,41 +62,35 @@ class NodeInfo(Resource):
         self.get_resource_names()
     
     def get_node_status(self):
-        nodes_json = ""
+        nodes_json = self.snapshot.get_manifest(self.json_nodes_path, self.yaml_nodes_path)
         
-        if self.ctrl.file_exists_in_tar(self.json_nodes_path):
-            json_nodes_text = self.ctrl.get_file_content(self.json_nodes_path)
-            nodes_json = json.loads(json_nodes_text)
-        else:
-            node_yaml_text = self.ctrl.get_file_content(self.yaml_nodes_path)
-            nodes_json = yaml.safe_load(node_yaml_text)
-        
-        describe_nodes_text = self.ctrl.get_file_content(self.describe_resource_path)
-        resources_dict = self.parse_describe_text(describe_nodes_text)
+        # Allocated resources are parsed from describe/nodes.txt when the bundle is ingested.
+        resources_dict = self.snapshot.node_resources
         
         get_node_output = self.get_resource_status()
 
         node_status = {}
-        for i in range(len(deep_get(nodes_json, ["items"], []))):
-            name = deep_get(nodes_json, ["items", i, "metadata", "name"], "Node name unavailable")
-            # annotations = deep_get(nodes_json, ["items", i, "metadata", "annotations"], "Node annotation unavailable")
-            labels = deep_get(nodes_json, ["items", i, "metadata", "labels"], {})
-            # taints = deep_get(nodes_json, ["items", i, "spec", "taints"], "Node taints unavailable")
-            ip = deep_get(nodes_json, ["items", i, "status", "addresses", 0, "address"], "Node ip unavailable")
+        for item in deep_get(nodes_json, ["items"], []):
+            name = deep_get(item, ["metadata", "name"], "Node name unavailable")
+            # annotations = deep_get(item, ["metadata", "annotations"], "Node annotation unavailable")
+            labels = deep_get(item, ["metadata", "labels"], {})
+            # taints = deep_get(item, ["spec", "taints"], "Node taints unavailable")
+            ip = deep_get(item, ["status", "addresses", 0, "address"], "Node ip unavailable")
             workload_class = deep_get(labels, ["workload.sas.com/class"], "N/A")
-            allocatable_pods = deep_get(nodes_json, ["items", i, "status", "allocatable", "pods"], "Allocatable pods unavailable")
-            cpu_allocatable = deep_get(nodes_json, ["items", i, "status", "allocatable", "cpu"], "Allocatable node CPU unavailable")
-            cpu_capacity = deep_get(nodes_json, ["items", i, "status", "capacity", "cpu"], "Node CPU capacity unavailable")
-            memory_allocatable = deep_get(nodes_json, ["items", i, "status", "allocatable", "memory"], "Allocatable node memory unavailable")
-            memory_allocatable_gi = int(int(re.findall(r'\d+', memory_allocatable)[0]) / (1024 ** 2))
-            memory_capacity = deep_get(nodes_json, ["items", i, "status", "capacity", "memory"], "Node memory capacity unavailable")
-            memory_capacity_gi = int(int(re.findall(r'\d+', memory_capacity)[0]) / (1024 ** 2))
-            resources = deep_get(resources_dict, [name], DEAFULT_RESOURCES)
+            allocatable_pods = deep_get(item, ["status", "allocatable", "pods"], "Allocatable pods unavailable")
+            cpu_allocatable = deep_get(item, ["status", "allocatable", "cpu"], "Allocatable node CPU unavailable")
+            cpu_capacity = deep_get(item, ["status", "capacity", "cpu"], "Node CPU capacity unavailable")
+            memory_allocatable = deep_get(item, ["status", "allocatable", "memory"], "Allocatable node memory unavailable")
+            memory_allocatable_gi = to_gi(memory_allocatable)
+            memory_capacity = deep_get(item, ["status", "capacity", "memory"], "Node memory capacity unavailable")
+            memory_capacity_gi = to_gi(memory_capacity)
+            # A node without an "Allocated resources" block keeps the defaults for the missing fields.
+            resources = {**DEAFULT_RESOURCES, **deep_get(resources_dict, [name], {})}
             status = get_node_output[name]
             
             
             os_image_logo = "/home/admin/k8s-visualizer/frontend/src/assets/default.png"
-            os_image = deep_get(nodes_json, ["items", i, "status", "nodeInfo", "osImage"], "Node OS image unavailable")
+            os_image = deep_get(item, ["status", "nodeInfo", "osImage"], "Node OS image unavailable")
             for image_name in OS_LOGO_DICT.keys():
                 if image_name in os_image:
                     os_image_logo = OS_LOGO_DICT[image_name]
@@ -99,42 +114,64 @@ class NodeInfo(Resource):
     
 
     def parse_describe_text(self, describe_nodes_text):
-        line_split_text = describe_nodes_text.split('\n')
-        names = [i.split()[1] for i in line_split_text if i.startswith("Name:")]
-        non_terminated_pods = [i.split()[2].replace("(", "") for i in line_split_text if i.startswith("Non-terminated Pods:")]
-        
-        cpu_requests = [i.split()[1] for i in line_split_text if i.startswith("  cpu ")]
-        cpu_requests_pct = [i.split()[2].replace("(", "").replace(")", "") for i in line_split_text if i.startswith("  cpu ")]
-        
-        cpu_limits = [i.split()[3] for i in line_split_text if i.startswith("  cpu ")]
-        cpu_limits_pct = [i.split()[4].replace("(", "").replace(")", "") for i in line_split_text if i.startswith("  cpu ")]
-        
-        memory_requests = [i.split()[1] for i in line_split_text if i.startswith("  memory ")]
-        memory_requests_pct = [i.split()[2].replace("(", "").replace(")", "") for i in line_split_text if i.startswith("  memory ")]
-        
-        memory_limits = [i.split()[3] for i in line_split_text if i.startswith("  memory ")]
-        memory_limits_pct = [i.split()[4].replace("(", "").replace(")", "") for i in line_split_text if i.startswith("  memory ")]
-
-        zipped_data = zip(
-            names, non_terminated_pods, cpu_requests, cpu_requests_pct, 
-            cpu_limits, cpu_limits_pct, memory_requests, 
-            memory_requests_pct, memory_limits, memory_limits_pct
-        )
-
-        # Map the Name to a sub-dictionary of its metrics
-        non_terminated_pods_dict = {
-            row[0]: {
-                "non_terminated_pods": row[1],
-                "cpu_requests": row[2],
-                "cpu_requests_pct": row[3],
-                "cpu_limits": row[4],
-                "cpu_limits_pct": row[5],
-                "memory_requests": row[6],
-                "memory_requests_pct": row[7],
-                "memory_limits": row[8],
-                "memory_limits_pct": row[9]
-            }
-            for row in zipped_data
-        }
-        
-        return non_terminated_pods_dict
\ No newline at end of file
+        return parse_node_resources(describe_nodes_text)
+
+    def get_node_capacity(self):
+        """
+        Requests and limits of the running pods of every namespace in the bundle against the allocatable
+        resources of every node, summed per workload class and for the cluster. cpu is in cores and memory in bytes.
+        Every node is one row of the NODE_CAPACITY_COLUMNS arrays, which the pods add into.
+        """
+        nodes_json = self.snapshot.get_manifest(self.json_nodes_path, self.yaml_nodes_path)
+        # Nodes are shared by the namespaces, so the pods of namespaces other than the one collected count too.
+        pods = self.snapshot.get_all_pods()
+
+        columns = {column: array.array("d") for column in NODE_CAPACITY_COLUMNS}
+        node_names = []
+        node_classes = []
+        for item in deep_get(nodes_json, ["items"], []):
+            node_names.append(deep_get(item, ["metadata", "name"], "Node name unavailable"))
+            node_classes.append(deep_get(item, ["metadata", "labels", "workload.sas.com/class"], "N/A"))
+            for resource in ("cpu", "memory", "pods"):
+                columns[f"{resource}_allocatable"].append(parse_quantity(deep_get(item, ["status", "allocatable", resource])) or 0)
+            for resource in ("cpu", "memory"):
+                columns[f"{resource}_capacity"].append(parse_quantity(deep_get(item, ["status", "capacity", resource])) or 0)
+            for column in ("cpu_requests", "cpu_limits", "memory_requests", "memory_limits", "pods"):
+                columns[column].append(0)
+
+        node_positions = {name: position for position, name in enumerate(node_names)}
+        unscheduled_pods = 0
+        for pod in pods:
+            # Completed pods no longer hold their requests on the node.
+            if pod.phase in ("Succeeded", "Failed"):
+                continue
+            position = node_positions.get(pod.node)
+            if position is None:
+                unscheduled_pods += 1
+                continue
+
+            columns["cpu_requests"][position] += pod.cpu_requests
+            columns["memory_requests"][position] += pod.memory_requests
+            columns["cpu_limits"][position] += pod.cpu_limits
+            columns["memory_limits"][position] += pod.memory_limits
+            columns["pods"][position] += 1
+
+        nodes = {}
+        class_positions = {}
+        for position, name in enumerate(node_names):
+            nodes[name] = summarize_capacity({column: values[position] for column, values in columns.items()})
+            nodes[name]["workload_class"] = node_classes[position]
+            class_positions.setdefault(node_classes[position], []).append(position)
+
+        workload_classes = {}
+        for workload_class, positions in class_positions.items():
+            workload_classes[workload_class] = summarize_capacity(
+                {column: sum(values[position] for position in positions) for column, values in columns.items()}
+            )
+            workload_classes[workload_class]["nodes"] = len(positions)
+
+        cluster = summarize_capacity({column: sum(values) for column, values in columns.items()})
+        cluster["nodes"] = len(node_names)
+        cluster["unscheduled_pods"] = unscheduled_pods
+
+        return {"nodes": nodes, "workload_classes": workload_classes, "cluster": cluster}
@@ -1,13 +1,19 @@
 # pod.py
 
 import os
-import yaml
 import json
 
+from datetime import datetime, timezone
+from operator import itemgetter
 from collections import defaultdict
 
-from utils.dict_utils import deep_get
 from resources.resources import Resource
+from utils.log_reader import LogReader, parse_log_line
+from utils.log_controller import LogController
+from utils.log_index import LOG_LEVELS, get_log_index, read_filtered_log, count_levels_by_bucket
+from utils.responses import dumps
+
+LEVEL_NAMES = {precedence: level for level, precedence in LOG_LEVELS.items()}
 
 
 class PodInfo(Resource):
@@ -23,43 +29,16 @@ class PodInfo(Resource):
         self.get_resource_names()
     
     def get_pod_containers(self):
-        pods_json = ""
-        
-        if self.ctrl.file_exists_in_tar(self.json_pods_path):
-            json_nodes_text = self.ctrl.get_file_content(self.json_pods_path)
-            pods_json = json.loads(json_nodes_text)
-        else:
-            node_yaml_text = self.ctrl.get_file_content(self.yaml_pods_path)
-            pods_json = yaml.safe_load(node_yaml_text)
-            
         pod_containers = {}
-        for i in range(len(deep_get(pods_json, ["items"], []))):
-            name = deep_get(pods_json, ["items", i, "metadata", "name"])
-            
-            init_containers = [j["name"] for j in deep_get(pods_json, ["items", i, "status", "initContainerStatuses"]) or ""]
-            containers = [j["name"] for j in deep_get(pods_json, ["items", i, "status", "containerStatuses"]) or ""]
-            
-            pod_containers[name] = init_containers + containers
+        for pod in self.snapshot.get_pods(self.json_pods_path, self.yaml_pods_path):
+            pod_containers[pod.name] = list(pod.init_containers + pod.containers)
         
         return pod_containers
     
     def get_pods_by_workload_class(self):
-        if self.ctrl.file_exists_in_tar(self.json_pods_path):
-            pods_json_text = self.ctrl.get_file_content(self.json_pods_path)
-            pods_json = json.loads(pods_json_text)
-        else:
-            pods_yaml_text = self.ctrl.get_file_content(self.yaml_pods_path)
-            pods_json = yaml.safe_load(pods_yaml_text)
         pods_by_workload_class = {}
-        for i in range(len(deep_get(pods_json, ["items"], []))):
-            name = deep_get(pods_json, ["items", i, "metadata", "name"])
-            
-            workdload_class = deep_get(pods_json, ["items", i, "metadata", "labels", "workload.sas.com/class"], "undefined")
-            
-            if workdload_class in pods_by_workload_class.keys():
-                pods_by_workload_class[workdload_class].append(name)
-            else:
-                pods_by_workload_class[workdload_class] = [name]
+        for pod in self.snapshot.get_pods(self.json_pods_path, self.yaml_pods_path):
+            pods_by_workload_class.setdefault(pod.workload_class, []).append(pod.name)
         
         return pods_by_workload_class
     
@@ -78,4 +57,78 @@ class PodInfo(Resource):
                 except json.JSONDecodeError:
                     log_line_list.append(line)
   
-        return log_line_list
\ No newline at end of file
+        return log_line_list
+
+    def get_pod_container_log_parsed(self, pod, container, requested_items, requested_level):
+        """Returns the lines at `requested_level` or above with only `requested_items`; other lines are kept as text."""
+        pod_log_path  = f"{self.pods_log_path}/{pod}_{container}.log"
+        log_content = self.ctrl.get_file_content(pod_log_path)
+        if not log_content:
+            return [f"No logs in file: {os.path.basename(pod_log_path)}"]
+
+        return LogController(log_content, requested_items, requested_level).parse_log()
+
+    def get_pod_container_log_reader(self, pod, container):
+        return LogReader(self.ctrl, f"{self.pods_log_path}/{pod}_{container}.log")
+
+    def get_pod_container_log_page(self, pod, container, cursor=0, limit=1000):
+        """Returns `limit` lines of the log from the byte `cursor`, with the cursor of the next page."""
+        return self.get_pod_container_log_reader(pod, container).read_page(cursor, limit)
+
+    def get_pod_container_log_tail(self, pod, container, n):
+        """Returns the last `n` lines of the log without reading the rest of it."""
+        return self.get_pod_container_log_reader(pod, container).read_tail(n)
+
+    def get_pod_container_log_filtered(self, pod, container, since=None, until=None, min_level=None, cursor=0, limit=None):
+        """Returns the lines between `since` and `until` at `min_level` or above, using the index of the log."""
+        return read_filtered_log(self.get_pod_container_log_reader(pod, container), since, until, min_level, cursor, limit)
+
+    def iter_pod_container_log(self, pod, container, cursor=0):
+        """Yields the log from the byte `cursor` as NDJSON, one encoded line at a time."""
+        for _, line in self.get_pod_container_log_reader(pod, container).iter_lines(cursor):
+            if line.strip():
+                yield dumps(parse_log_line(line)) + b"\n"
+
+    def get_log_level_histogram(self, bucket_seconds=60):
+        """
+        Line counts of every container log of the bundle, in any namespace, per pod, container, level
+        and minute, plus the error rate (ERROR and FATAL lines) of each container, from the indexes of the logs.
+        """
+        assert bucket_seconds > 0, "bucket_seconds must be greater than 0"
+        buckets = []
+        containers = []
+        # The logs are indexed in archive order; only the rows are sorted.
+        for log_path in self.ctrl.in_archive_order(self.snapshot.log_members):
+            namespace = log_path.split("/")[1]
+            pod, _, container = os.path.basename(log_path)[:-len(".log")].rpartition("_")
+            counts = count_levels_by_bucket(get_log_index(LogReader(self.ctrl, log_path)), bucket_seconds)
+
+            errors = 0
+            for (bucket, level), count in counts.items():
+                # Per container in time order, lines without a timestamp last
+                order = (namespace, pod, container, bucket is None, bucket or 0, level)
+                buckets.append((order, {
+                    "namespace": namespace,
+                    "pod": pod,
+                    "container": container,
+                    "level": LEVEL_NAMES.get(level, "UNKNOWN"),
+                    "time": None if bucket is None else datetime.fromtimestamp(bucket, timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
+                    "count": count
+                }))
+                if level >= LOG_LEVELS["ERROR"]:
+                    errors += count
+
+            lines = sum(counts.values())
+            containers.append({
+                "namespace": namespace,
+                "pod": pod,
+                "container": container,
+                "lines": lines,
+                "errors": errors,
+                "error_rate": errors / lines if lines else 0
+            })
+
+        buckets = [row for _, row in sorted(buckets, key=itemgetter(0))]
+        containers.sort(key=itemgetter("namespace", "pod", "container"))
+
+        return {"bucket_seconds": bucket_seconds, "buckets": buckets, "containers": containers}
@@ -2,6 +2,7 @@
 
 from resources.pv import PVInfo
 from resources.resources import Resource
+from utils.relationship_graph import PVCS, PVS
 
 class PVCInfo(Resource):
     def __init__(self, file_name):
@@ -15,10 +16,14 @@ class PVCInfo(Resource):
         self.get_resource_names()
     
     def get_pv_describe(self):
-        pv_describe_clusterwide = self.pv_info.get_resource_describe()
-        pvc_status = self.get_resource_status()
-        pvc_pv_mapping = {pvc: pvc_status[pvc]['VOLUME'] for pvc in pvc_status}
-        
-        pv_describe = {pvc: pv_describe_clusterwide.get(pvc_pv_mapping[pvc], "Not found") for pvc in self.names}
+        # The PVC -> PV links are read once at ingestion; only the describe of each bound PV is looked up.
+        relationships = self.snapshot.get_relationships(self.namespace)
+        pv_describe_clusterwide = self.snapshot.get_describe(self.pv_info.describe_resource_path)
+
+        pv_describe = {}
+        for pvc in self.names:
+            volumes = relationships.linked(PVCS, pvc, PVS)
+            describe_object = pv_describe_clusterwide.find(volumes[0]) if volumes else None
+            pv_describe[pvc] = describe_object if describe_object is not None else "Not found"
         
-        return pv_describe
\ No newline at end of file
+        return pv_describe
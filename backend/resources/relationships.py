@@ -0,0 +1,21 @@
+# relationships.py
+
+from resources.resources import Resource, K8S_ABBREVIATIONS
+
+class RelationshipInfo(Resource):
+    def __init__(self, file_name):
+        super().__init__(file_name)
+
+        self.relationships = self.snapshot.get_relationships(self.namespace)
+
+    def get_neighbors(self, kind, name, neighbor_kind=None):
+        """Returns the objects linked to one pod, node, PVC, PV or owner, e.g. the pods running on a node."""
+        kind = K8S_ABBREVIATIONS.get(kind, kind)
+        neighbors = self.relationships.neighbors(kind, name)
+        assert neighbors is not None, f"'{name}' not found in the {kind} of {self.namespace}"
+
+        if neighbor_kind is not None:
+            neighbor_kind = K8S_ABBREVIATIONS.get(neighbor_kind, neighbor_kind)
+            neighbors = {neighbor_kind: neighbors.get(neighbor_kind, [])}
+
+        return {"kind": kind, "name": name, "neighbors": neighbors}
@@ -5,7 +5,9 @@ import difflib
 
 from resources.env import EnvInfo
 
-from utils.tar_controller import TarController
+from utils.snapshot import get_snapshot
+from utils.tar_controller import get_tar_controller
+from utils import parsers
 
 K8S_ABBREVIATIONS = {
     "po": "pods",
@@ -27,7 +29,7 @@ K8S_ABBREVIATIONS = {
 class Resource:
     def __init__(self, file_name, resource_name=""):
         self.file_name = file_name
-        self.ctrl = TarController(self.file_name)
+        self.snapshot = get_snapshot(self.file_name)
         
         self.env_info = EnvInfo(file_name)
         self.env_info_dict = self.env_info.get_env_info_dict()
@@ -47,95 +49,46 @@ class Resource:
                 
             self.names = self.get_resource_names()
     
+    @property
+    def ctrl(self):
+        # Only raw members such as container logs are still read from the archive itself.
+        return get_tar_controller(self.file_name)
+    
     def get_available_resource_types(self):
-        available_resource_paths = self.ctrl.list_files_in_dir(self.get_folder_path)
+        available_resource_paths = self.snapshot.list_get_outputs(self.get_folder_path)
         self.available_resource_types = [os.path.basename(os.path.splitext(i)[0]) for i in available_resource_paths]
             
         return self.available_resource_types
     
     def get_resource_names(self):
-        get_resource_text = self.ctrl.get_file_content(self.get_resource_path)
-        self.names = self.get_names_from_get_output(get_resource_text)
+        self.names, _ = self.snapshot.get_output(self.get_resource_path)
 
         return self.names
     
     def get_resource_status(self):
-        get_resource_text = self.ctrl.get_file_content(self.get_resource_path)            
-        get_resource = self.parse_get_output(get_resource_text)
+        _, get_resource = self.snapshot.get_output(self.get_resource_path)
             
         return get_resource
 
     def get_resource_describe(self):
-        describe_resource_text = self.ctrl.get_file_content(self.describe_resource_path)
-        
-        describe = self.parse_describe_output(describe_resource_text)
-        
-        describe_sections = []
-        for each_describe in describe:
-            describe_by_section = {}
-            for line in each_describe.split('\n'):
-                if not line.startswith(' ') and line:
-                    section_name = line.split(':')[0]
-                if section_name not in describe_by_section.keys():
-                    describe_by_section[section_name] = line
-                else:
-                    describe_by_section[section_name] = "\n".join((describe_by_section[section_name], line))
-            describe_sections.append(describe_by_section)
+        describe_sections = self.snapshot.get_describe(self.describe_resource_path)
 
         describe_section_dict = dict(zip(self.names, describe_sections))
         
         return describe_section_dict
 
+    def get_resource_describe_object(self, object_name):
+        """Returns the describe sections of one object, without cutting out the others."""
+        describe_object = self.snapshot.get_describe(self.describe_resource_path).find(object_name)
+        assert describe_object is not None, f"'{object_name}' not found in {os.path.basename(self.describe_resource_path)}"
+
+        return describe_object
     
     def parse_get_output(self, get_text):
-        get_output = {}
-        columns = []
-        get_text_split = get_text.split('\n')
-        for line in get_text_split:
-            if line.startswith("NAME"):
-                columns = [i.strip() for i in line.split("  ")[1:] if i]
-                continue
-            line_split = [i.strip() for i in line.split("  ") if i]
-            if line_split and columns:
-                name = line_split[0]
-                get_output[name] = dict(zip(columns, line_split[1:]))
-        
-        return get_output
+        return parsers.parse_get_output(get_text)
 
     def get_names_from_get_output(self, get_text):
-        names = []
-        get_text_split = get_text.split('\n')
-        for line in get_text_split:
-            if line.startswith("NAME"):
-                columns = [i.strip() for i in line.split("  ")[1:] if i]
-                continue
-            line_split = [i.strip() for i in line.split("  ") if i]
-            if line_split and columns:
-                name = line_split[0]
-                names.append(name)
-        
-        return names
+        return parsers.get_names_from_get_output(get_text)
     
     def parse_describe_output(self, describe_text):
-        describe_split_text = describe_text.split('\n')
-        describe = []
-        current_group = ""
-        name_line = ""
-        
-        for line in describe_split_text:
-            if line.startswith("Name:"):
-                name_line = line
-                if current_group:
-                    describe.append(current_group)
-                    current_group = ""
-            else:
-                if name_line:
-                    current_group = '\n'.join([name_line, line])
-                else:
-                    current_group = '\n'.join([current_group, line])
-                name_line = ""
-        
-        if current_group:
-            describe.append(current_group)
-        
-        return describe
\ No newline at end of file
+        return parsers.parse_describe_output(describe_text)
@@ -0,0 +1,16 @@
+from fastapi import APIRouter, HTTPException
+from fastapi_cache import FastAPICache
+
+router = APIRouter(
+    prefix="/cache",
+    tags=["Cache"]
+)
+
+@router.get("/stats",
+         summary="Returns hit/miss counters and memory use of the response cache.")
+async def get_cache_stats():
+    backend = FastAPICache.get_backend()
+    try:
+        return backend.get_stats()
+    except AttributeError:
+        raise HTTPException(status_code=400, detail=f"{type(backend).__name__} does not keep cache statistics")
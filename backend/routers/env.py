@@ -7,6 +7,8 @@ router = APIRouter(
 )
 
 from utils.conf import CACHE_TIMEOUT
+from utils.executor import run_io, load_resource
+from utils.responses import json_response
 from resources.env import EnvInfo
 
 @router.get("/info",
@@ -14,9 +16,9 @@ from resources.env import EnvInfo
          description="Sample input: /home/admin/sample/CS0343372_20251215_100140.tgz")
 @cache(expire=CACHE_TIMEOUT)
 async def get_env_info_dict(file_name: str):
-    env_info = EnvInfo(file_name)
+    env_info = await load_resource(EnvInfo, file_name)
     try:
-        env_info_dict = env_info.get_env_info_dict()
+        env_info_dict = await run_io(json_response, env_info.get_env_info_dict)
         return env_info_dict
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"There was an error parsing the environment information: {e}")
\ No newline at end of file
@@ -1,8 +1,12 @@
 # file_manager.py
 
+import os
+
 from fastapi import APIRouter, UploadFile, File, HTTPException
 
 from utils import file_manager
+from utils.executor import run_io
+from utils.warmup import start_warmup, get_warmup_status, cancel_warmup
 
 router = APIRouter(
     tags=["Upload file"]
@@ -11,12 +15,18 @@ router = APIRouter(
 UPLOAD_DIR = '/tmp'
 
 @router.post("/upload")
-async def upload_file(file: UploadFile = File(...)):
+async def upload_file(file: UploadFile = File(...), warm_cache: bool = True):
     """
     Receives a .tgz file and saves it to the server's '/tmp' directory.
+    With `warm_cache`, the dashboard responses are computed in the background; poll /warmup/{job_id} for progress.
     """
     try:
-        return file_manager.upload_file(file)
+        upload_result = await file_manager.upload_file(file)
+        if warm_cache:
+            upload_result["warmup"] = start_warmup(upload_result["file_location"], upload_result["sha256"]).status()
+        return upload_result
+    except AssertionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"There was an error uploading the file: {e}")
     
@@ -26,10 +36,22 @@ async def delete_file(file_name: str):
     Deletes a specific file from the UPLOAD_DIR.
     """
     try:
-        return file_manager.delete_file(file_name)
+        cancel_warmup(os.path.join(file_manager.UPLOAD_DIR, file_name))
+        return await run_io(file_manager.delete_file, file_name)
     
     except AssertionError as e:
         raise HTTPException(status_code=400, detail=str(e))
     
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error deleting file: {e}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error deleting file: {e}")
+
+@router.get("/warmup/{job_id}")
+async def get_warmup(job_id: str):
+    """
+    Returns the progress of the cache warm-up started by an upload. The job id is the sha256 of the bundle.
+    """
+    try:
+        return get_warmup_status(job_id)
+
+    except AssertionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -0,0 +1,32 @@
+from fastapi import APIRouter, HTTPException
+from fastapi_cache.decorator import cache
+
+from utils.conf import CACHE_TIMEOUT
+from utils.executor import run_io, ensure_search_index
+from utils.responses import json_response
+from utils.log_search import search_logs
+
+router = APIRouter(
+    prefix="/logs",
+    tags=["Log Search"]
+)
+
+@router.get("/search",
+         summary="Returns the container log lines of the bundle matching every word of a query",
+         description="""
+         Sample input: 
+         \n - file_name: /home/admin/sample/CS0343372_20251215_100140.tgz
+         \n - query: words are matched case-insensitively, "quoted words" as a phrase and a trailing * as a prefix, e.g. "connection refused" postgres*
+         \n - offset, limit (optional): page of the hits, with the `next_offset` to pass for the next page
+         \n The search index of a bundle is built on its first search. `total` is null when the query has a phrase or a common word, as only the lines up to the page are checked.
+         """)
+@cache(expire=CACHE_TIMEOUT)
+async def search_container_logs(file_name: str, query: str, offset: int = 0, limit: int = 100):
+    search_index = await ensure_search_index(file_name)
+    try:
+        hits = await run_io(json_response, search_logs, file_name, search_index, query, offset, limit)
+        return hits
+    except AssertionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -7,6 +7,8 @@ router = APIRouter(
 )
 
 from utils.conf import CACHE_TIMEOUT
+from utils.executor import run_io, load_resource
+from utils.responses import json_response
 from resources.node import NodeInfo
 
 @router.get("/status",
@@ -14,9 +16,9 @@ from resources.node import NodeInfo
          description="Sample input: /home/admin/sample/CS0343372_20251215_100140.tgz")
 @cache(expire=CACHE_TIMEOUT)
 async def get_node_status(file_name: str):
-    node_info = NodeInfo(file_name)
+    node_info = await load_resource(NodeInfo, file_name)
     try:
-        node_status = node_info.get_node_status()
+        node_status = await run_io(json_response, node_info.get_node_status)
         return node_status
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"There was an error parsing the node status: {e}")
@@ -26,21 +28,49 @@ async def get_node_status(file_name: str):
          description="Sample input: /home/admin/sample/CS0343372_20251215_100140.tgz")
 @cache(expire=CACHE_TIMEOUT)
 async def get_node_describe(file_name: str):
-    node_info = NodeInfo(file_name)
+    node_info = await load_resource(NodeInfo, file_name)
     try:
-        node_describe = node_info.get_resource_describe()
+        node_describe = await run_io(json_response, node_info.get_resource_describe)
         return node_describe
     except Exception as e:
        raise HTTPException(status_code=500, detail=f"There was an error parsing the environment information: {e}")
 
+@router.get("/describe/{node_name}",
+         summary="Returns kubectl describe output of one node.",
+         description="""Sample input: 
+         \n - file_name: /home/admin/sample/CS0343372_20251215_100140.tgz
+         \n - node_name: aks-cas-12345678-vmss000000""")
+@cache(expire=CACHE_TIMEOUT)
+async def get_node_describe_object(file_name: str, node_name: str):
+    node_info = await load_resource(NodeInfo, file_name)
+    try:
+        node_describe_object = await run_io(json_response, node_info.get_resource_describe_object, node_name)
+        return node_describe_object
+    except AssertionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"There was an error parsing the describe output of {node_name}: {e}")
+
+@router.get("/capacity",
+         summary="Returns requests and limits against allocatable cpu, memory and pods per node, per workload class and for the cluster.",
+         description="Sample input: /home/admin/sample/CS0343372_20251215_100140.tgz")
+@cache(expire=CACHE_TIMEOUT)
+async def get_node_capacity(file_name: str):
+    node_info = await load_resource(NodeInfo, file_name)
+    try:
+        node_capacity = await run_io(json_response, node_info.get_node_capacity)
+        return node_capacity
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"There was an error computing the node capacity: {e}")
+
 @router.get("/list_names",
          summary="Returns names of nodes as a list.",
          description="Sample input: /home/admin/sample/CS0343372_20251215_100140.tgz")
 @cache(expire=CACHE_TIMEOUT)
 async def get_node_names(file_name: str):
-    node_info = NodeInfo(file_name)
+    node_info = await load_resource(NodeInfo, file_name)
     try:
-        node_names = node_info.get_resource_names()
+        node_names = await run_io(json_response, node_info.get_resource_names)
         return node_names
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"There was an error parsing list of nodes: {e}")
@@ -50,9 +80,9 @@ async def get_node_names(file_name: str):
          description="Sample input: /home/admin/sample/CS0343372_20251215_100140.tgz")
 @cache(expire=CACHE_TIMEOUT)
 async def get_node_describe_section(file_name: str):
-    node_info = NodeInfo(file_name)
+    node_info = await load_resource(NodeInfo, file_name)
     try:
-        node_describe_section = node_info.get_resource_describe_section()
+        node_describe_section = await run_io(json_response, node_info.get_resource_describe_section)
         return node_describe_section
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"There was an error parsing sections in describe output: {e}")
@@ -62,9 +92,9 @@ async def get_node_describe_section(file_name: str):
          description="Sample input: /home/admin/sample/CS0343372_20251215_100140.tgz")
 @cache(expire=CACHE_TIMEOUT)
 async def get_nodes(file_name: str):
-    node_info = NodeInfo(file_name)
+    node_info = await load_resource(NodeInfo, file_name)
     try:
-        node_status = node_info.get_resource_status()
+        node_status = await run_io(json_response, node_info.get_resource_status)
         return node_status
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"There was an error parsing the get nodes output: {e}")
\ No newline at end of file
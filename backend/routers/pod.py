@@ -1,10 +1,13 @@
-from typing import List
+from typing import List, Optional
 from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from fastapi_cache.decorator import cache
 
 
 from resources.pod import PodInfo
 from utils.conf import CACHE_TIMEOUT
+from utils.executor import run_io, load_resource, ensure_log_indexes
+from utils.responses import json_response
 from utils.log_controller import LogController
 
 router = APIRouter(
@@ -17,9 +20,9 @@ router = APIRouter(
          description="Sample input: /home/admin/sample/CS0343372_20251215_100140.tgz")
 @cache(expire=CACHE_TIMEOUT)
 async def get_pod_containers(file_name: str):
-    pod_info = PodInfo(file_name)
+    pod_info = await load_resource(PodInfo, file_name)
     try:
-        pod_containers = pod_info.get_pod_containers()
+        pod_containers = await run_io(json_response, pod_info.get_pod_containers)
         return pod_containers
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -29,9 +32,9 @@ async def get_pod_containers(file_name: str):
          description="Sample input: /home/admin/sample/CS0343372_20251215_100140.tgz")
 @cache(expire=CACHE_TIMEOUT)
 async def get_pods_by_workload_class(file_name: str):
-    pod_info = PodInfo(file_name)
+    pod_info = await load_resource(PodInfo, file_name)
     try:
-        pods_by_workload_class = pod_info.get_pods_by_workload_class()
+        pods_by_workload_class = await run_io(json_response, pod_info.get_pods_by_workload_class)
         return pods_by_workload_class
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -43,12 +46,88 @@ async def get_pods_by_workload_class(file_name: str):
          \n - file_name: /home/admin/sample/CS0343372_20251215_100140.tgz
          \n - pod: sas-transformations-5c95d977dd-82kl5
          \n - container: sas-transformations
+         \n - limit (optional): returns a page of this many lines from `cursor`, with the `next_cursor` to pass for the next page
+         \n - tail (optional): returns the last N lines
+         \n - since, until (optional): ISO 8601 timestamps, e.g. 2025-12-15T14:00:00Z
+         \n - min_level (optional): TRACE, DEBUG, INFO, WARN, ERROR or FATAL
          """)
 @cache(expire=CACHE_TIMEOUT)
-async def get_pod_container_log(file_name: str, pod: str, container: str):
-    pod_info = PodInfo(file_name)
+async def get_pod_container_log(file_name: str, pod: str, container: str,
+                                cursor: int = 0, limit: Optional[int] = None, tail: Optional[int] = None,
+                                since: Optional[str] = None, until: Optional[str] = None, min_level: Optional[str] = None):
+    pod_info = await load_resource(PodInfo, file_name)
     try:
-        pod_container_log = pod_info.get_pod_container_log(pod, container)
+        if since is not None or until is not None or min_level is not None:
+            pod_container_log = await run_io(json_response, pod_info.get_pod_container_log_filtered,
+                                             pod, container, since, until, min_level, cursor, limit)
+        elif tail is not None:
+            pod_container_log = await run_io(json_response, pod_info.get_pod_container_log_tail, pod, container, tail)
+        elif limit is not None:
+            pod_container_log = await run_io(json_response, pod_info.get_pod_container_log_page, pod, container, cursor, limit)
+        else:
+            pod_container_log = await run_io(json_response, pod_info.get_pod_container_log, pod, container)
         return pod_container_log
+    except AssertionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/logs/histogram",
+         summary="Returns the number of log lines per namespace, pod, container, level and minute, and the error rate of each container",
+         description="""
+         Sample input: 
+         \n - file_name: /home/admin/sample/CS0343372_20251215_100140.tgz
+         \n - bucket_seconds (optional): width of the time buckets, 60 by default
+         """)
+@cache(expire=CACHE_TIMEOUT)
+async def get_log_level_histogram(file_name: str, bucket_seconds: int = 60):
+    pod_info = await load_resource(PodInfo, file_name)
+    await ensure_log_indexes(file_name, pod_info.snapshot.log_members)
+    try:
+        log_level_histogram = await run_io(json_response, pod_info.get_log_level_histogram, bucket_seconds)
+        return log_level_histogram
+    except AssertionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/logs/parsed",
+         summary="Returns the lines of a container log at a level or above, with only the requested items of each line",
+         description="""
+         Sample input: 
+         \n - file_name: /home/admin/sample/CS0343372_20251215_100140.tgz
+         \n - pod: sas-transformations-5c95d977dd-82kl5
+         \n - container: sas-transformations
+         \n - level (optional): TRACE, DEBUG, INFO, WARN, ERROR or FATAL, INFO by default
+         \n - items (optional): keys kept from each line, timeStamp, level and message by default
+         """)
+@cache(expire=CACHE_TIMEOUT)
+async def get_pod_container_log_parsed(file_name: str, pod: str, container: str, level: str = "info",
+                                       items: List[str] = Query(['timeStamp', 'level', 'message'])):
+    pod_info = await load_resource(PodInfo, file_name)
+    try:
+        pod_container_log = await run_io(json_response, pod_info.get_pod_container_log_parsed, pod, container, items, level)
+        return pod_container_log
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/logs/stream",
+         summary="Streams a container log as NDJSON, one parsed line per line",
+         description="""
+         Sample input: 
+         \n - file_name: /home/admin/sample/CS0343372_20251215_100140.tgz
+         \n - pod: sas-transformations-5c95d977dd-82kl5
+         \n - container: sas-transformations
+         \n - cursor (optional): byte offset to start from, e.g. the `next_cursor` of a page
+         """)
+async def stream_pod_container_log(file_name: str, pod: str, container: str, cursor: int = 0):
+    pod_info = await load_resource(PodInfo, file_name)
+    try:
+        # Checks the log exists before the response starts; the lines are read lazily in the thread pool.
+        log_reader = await run_io(pod_info.get_pod_container_log_reader, pod, container)
+        assert 0 <= cursor <= log_reader.size, f"cursor must be between 0 and {log_reader.size}"
+        return StreamingResponse(pod_info.iter_pod_container_log(pod, container, cursor), media_type="application/x-ndjson")
+    except AssertionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
@@ -2,6 +2,8 @@ from fastapi import APIRouter, HTTPException
 from fastapi_cache.decorator import cache
 
 from utils.conf import CACHE_TIMEOUT
+from utils.executor import run_io, load_resource
+from utils.responses import json_response
 from resources.pvc import PVCInfo
 
 
@@ -15,9 +17,9 @@ router = APIRouter(
          description="Sample input: /home/admin/sample/CS0343372_20251215_100140.tgz")
 @cache(expire=CACHE_TIMEOUT)
 async def get_pv_describe(file_name: str):
-    pvc_info = PVCInfo(file_name)
+    pvc_info = await load_resource(PVCInfo, file_name)
     try:
-        pv_describe = pvc_info.get_pv_describe()
+        pv_describe = await run_io(json_response, pvc_info.get_pv_describe)
         return pv_describe
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
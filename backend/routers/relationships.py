@@ -0,0 +1,32 @@
+from typing import Optional
+from fastapi import APIRouter, HTTPException
+from fastapi_cache.decorator import cache
+
+from utils.conf import CACHE_TIMEOUT
+from utils.executor import run_io, load_resource
+from utils.responses import json_response
+from resources.relationships import RelationshipInfo
+
+
+router = APIRouter(
+    prefix="/relationships",
+    tags=["Relationships between Resources"]
+)
+
+@router.get("/{kind}/{name}",
+         summary="Returns the pods, nodes, PVCs, PVs and owners linked to one object.",
+         description="""Sample input: 
+         \n - file_name: /home/admin/sample/CS0343372_20251215_100140.tgz
+         \n - kind: pods, nodes, persistentvolumeclaims, persistentvolumes, replicasets, deployments, statefulsets (or their abbreviations)
+         \n - name: aks-cas-12345678-vmss000000
+         \n - neighbor_kind (optional): only returns the linked objects of this kind, e.g. pods""")
+@cache(expire=CACHE_TIMEOUT)
+async def get_neighbors(file_name: str, kind: str, name: str, neighbor_kind: Optional[str] = None):
+    relationship_info = await load_resource(RelationshipInfo, file_name)
+    try:
+        neighbors = await run_io(json_response, relationship_info.get_neighbors, kind, name, neighbor_kind)
+        return neighbors
+    except AssertionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -2,6 +2,8 @@ from fastapi import APIRouter, HTTPException
 from fastapi_cache.decorator import cache
 
 from utils.conf import CACHE_TIMEOUT
+from utils.executor import run_io, load_resource
+from utils.responses import json_response
 from resources.resources import Resource
 
 
@@ -17,9 +19,9 @@ router = APIRouter(
          \n - resource_name: configmaps""")
 @cache(expire=CACHE_TIMEOUT)
 async def get_resource_status(file_name: str, resource_name: str):
-    resource_info = Resource(file_name, resource_name)
+    resource_info = await load_resource(Resource, file_name, resource_name)
     try:
-        resource_status = resource_info.get_resource_status()
+        resource_status = await run_io(json_response, resource_info.get_resource_status)
         return resource_status
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -31,21 +33,38 @@ async def get_resource_status(file_name: str, resource_name: str):
          \n - resource_name: configmaps""")
 @cache(expire=CACHE_TIMEOUT)
 async def get_resource_describe(file_name: str, resource_name: str):
-    resource_info = Resource(file_name, resource_name)
+    resource_info = await load_resource(Resource, file_name, resource_name)
     try:
-        resource_describe = resource_info.get_resource_describe()
+        resource_describe = await run_io(json_response, resource_info.get_resource_describe)
         return resource_describe
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
+@router.get("/describe/{resource_name}/{object_name}",
+         summary="Returns kubectl describe <COMPONENT> <NAME> output of one object.",
+         description="""Sample input: 
+         \n - file_name: /home/admin/sample/CS0343372_20251215_100140.tgz
+         \n - resource_name: pods
+         \n - object_name: sas-transformations-5c95d977dd-82kl5""")
+@cache(expire=CACHE_TIMEOUT)
+async def get_resource_describe_object(file_name: str, resource_name: str, object_name: str):
+    resource_info = await load_resource(Resource, file_name, resource_name)
+    try:
+        resource_describe_object = await run_io(json_response, resource_info.get_resource_describe_object, object_name)
+        return resource_describe_object
+    except AssertionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
 @router.get("/describe_section",
          summary="Returns kubectl describe <COMPONENT> output sections.",
          description="Sample input: /home/admin/sample/CS0343372_20251215_100140.tgz")
 @cache(expire=CACHE_TIMEOUT)
 async def get_resource_describe_section(file_name: str, resource_name: str):
-    resource_info = Resource(file_name, resource_name)
+    resource_info = await load_resource(Resource, file_name, resource_name)
     try:
-        resource_describe_section = resource_info.get_resource_describe_section()
+        resource_describe_section = await run_io(json_response, resource_info.get_resource_describe_section)
         return resource_describe_section
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -58,9 +77,9 @@ async def get_resource_describe_section(file_name: str, resource_name: str):
          \n - resource_name: configmaps""")
 @cache(expire=CACHE_TIMEOUT)
 async def get_resource_names(file_name: str, resource_name: str):
-    resource_info = Resource(file_name, resource_name)
+    resource_info = await load_resource(Resource, file_name, resource_name)
     try:
-        resource_names = resource_info.get_resource_names()
+        resource_names = await run_io(json_response, resource_info.get_resource_names)
         return resource_names
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -70,9 +89,9 @@ async def get_resource_names(file_name: str, resource_name: str):
          description="Sample input: /home/admin/sample/CS0343372_20251215_100140.tgz")
 @cache(expire=CACHE_TIMEOUT)
 async def get_available_resource_types(file_name: str):
-    resource_info = Resource(file_name)
+    resource_info = await load_resource(Resource, file_name)
     try:
-        avail_resource_types = resource_info.get_available_resource_types()
+        avail_resource_types = await run_io(json_response, resource_info.get_available_resource_types)
         return avail_resource_types
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
@@ -1,27 +1,75 @@
 # test_main.py
 # $ pytest -v
 
+import io
 import os
+import gzip
+import shutil
+import json
+import math
+import time
+import array
+import random
 import pytest
+import tarfile
 from fastapi.testclient import TestClient
 from fastapi_cache import FastAPICache
 from fastapi_cache.backends.inmemory import InMemoryBackend
 
 @pytest.fixture(autouse=True)
 def setup_test_cache():
-    # This initializes the cache before every test
-    FastAPICache.init(InMemoryBackend())
+    # This initializes the cache before every test, with the keys and coder main.py uses.
+    # fastapi-cache keeps the key builder and coder an endpoint was first called with, so every test uses the same ones.
+    FastAPICache.init(InMemoryBackend(), coder=ORJsonCoder, key_builder=bundle_key_builder)
+    # All InMemoryBackends share one store, and an identical bundle of an earlier test has the same keys.
+    InMemoryBackend._store.clear()
 
 
 from main import app
+from utils.cache import TieredBackend, ORJsonCoder, bundle_key_builder
+from utils.tar_index import GzipSeeker, StreamingIndexBuilder, TarIndex
+from utils.log_index import LogIndex
+from utils import log_search, manifest_reader
+from utils import snapshot as snapshot_module
 from conf_test import UPLOAD_DIR, TEST_FILE_NAME
 
 client = TestClient(app)
 
+def make_tgz(members):
+    """Builds a small in-memory .tgz from a {name: text} dict."""
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as tar:
+        for name, text in members.items():
+            data = text.encode()
+            tarinfo = tarfile.TarInfo(name)
+            tarinfo.size = len(data)
+            tar.addfile(tarinfo, io.BytesIO(data))
+    return buffer.getvalue()
+
+@pytest.fixture
+def upload_bundle(request):
+    """Uploads a .tgz built from a {name: text} dict, without warming the cache, and deletes it after the test."""
+    file_names = []
+
+    def upload(members, file_name=None):
+        file_name = file_name or f"{request.node.name}.tgz"
+        response = client.post(
+            "/upload",
+            params={"warm_cache": False},
+            files={"file": (file_name, make_tgz(members), "application/x-gtar")}
+        )
+        assert response.status_code == 200
+        file_names.append(file_name)
+        return f"{UPLOAD_DIR}/{file_name}"
+
+    yield upload
+    for file_name in dict.fromkeys(file_names):
+        client.delete(f"/delete/{file_name}")
+
 def test_upload_delete():
     """Test uploading a file and then deleting it."""
     file_name = "test_archive.tgz"
-    file_content = b"fake tarball content"
+    file_content = make_tgz({"./.get-k8s-info/get-k8s-info.log": "Namespace: viya"})
     
     response = client.post(
         "/upload",
@@ -39,6 +87,325 @@ def test_upload_delete():
     # 4. Verify file is gone
     assert not os.path.exists(f"{UPLOAD_DIR}/{file_name}")
 
+def test_upload_invalid_file():
+    """Test that a file that is not a .tgz archive is rejected before it is saved."""
+    file_name = "test_invalid.tgz"
+    response = client.post(
+        "/upload",
+        files={"file": (file_name, b"fake tarball content", "application/x-gtar")}
+    )
+    assert response.status_code == 400
+    assert not os.path.exists(f"{UPLOAD_DIR}/{file_name}")
+
+def test_upload_warmup_status():
+    """Test that an upload warms the cache of the dashboard endpoints in the background."""
+    file_name = "test_warmup.tgz"
+    file_content = make_tgz({"./.get-k8s-info/get-k8s-info.log": "Namespace: viya"})
+
+    # The warm-up task runs on the event loop of the client, which has to outlive the upload request.
+    with TestClient(app) as warmup_client:
+        FastAPICache.reset()
+        FastAPICache.init(TieredBackend(InMemoryBackend(), 1024 * 1024), coder=ORJsonCoder, key_builder=bundle_key_builder)
+        response = warmup_client.post(
+            "/upload",
+            files={"file": (file_name, file_content, "application/x-gtar")}
+        )
+        assert response.status_code == 200
+        job_id = response.json()["warmup"]["job_id"]
+        assert job_id == response.json()["sha256"]
+
+        for _ in range(100):
+            status_response = warmup_client.get(f"/warmup/{job_id}")
+            assert status_response.status_code == 200
+            if status_response.json()["state"] not in ("pending", "running"):
+                break
+            time.sleep(0.1)
+        # The bundle has no node or pod outputs, so those endpoints fail and the job ends as "failed".
+        assert status_response.json()["state"] in ("done", "failed")
+        assert status_response.json()["completed"] == status_response.json()["total"]
+
+        stats = warmup_client.get("/cache/stats").json()
+        for path in ("/env/info", "/resource/avail_types"):
+            response = warmup_client.get(path, params={"file_name": f"{UPLOAD_DIR}/{file_name}"})
+            assert response.status_code == 200
+        warmed_stats = warmup_client.get("/cache/stats").json()
+        assert warmed_stats["l1_hits"] == stats["l1_hits"] + 2
+        assert warmed_stats["misses"] == stats["misses"]
+
+        assert warmup_client.get("/warmup/imaginary_job").status_code == 400
+        warmup_client.delete(f"/delete/{file_name}")
+        # Deleting the bundle forgets its job.
+        assert warmup_client.get(f"/warmup/{job_id}").status_code == 400
+
+def test_tiered_cache_stats(upload_bundle):
+    """Test that a repeated request is served from the in-process cache."""
+    FastAPICache.reset()
+    FastAPICache.init(TieredBackend(InMemoryBackend(), 1024 * 1024), coder=ORJsonCoder, key_builder=bundle_key_builder)
+    file_location = upload_bundle({"./.get-k8s-info/get-k8s-info.log": "Namespace: viya"})
+
+    for _ in range(2):
+        response = client.get("/env/info", params={"file_name": file_location})
+        assert response.status_code == 200
+        assert response.json()["namespace"] == "viya"
+
+    stats = client.get("/cache/stats").json()
+    assert stats["misses"] == 1
+    assert stats["l1_hits"] == 1
+
+def test_cache_keys_follow_bundle_content(upload_bundle):
+    """Test that a bundle re-uploaded under the same name is not served stale and a renamed copy shares its entries."""
+    FastAPICache.reset()
+    FastAPICache.init(TieredBackend(InMemoryBackend(), 1024 * 1024), coder=ORJsonCoder, key_builder=bundle_key_builder)
+    file_location = upload_bundle({"./.get-k8s-info/get-k8s-info.log": "Namespace: first"})
+    assert client.get("/env/info", params={"file_name": file_location}).json()["namespace"] == "first"
+
+    file_location = upload_bundle({"./.get-k8s-info/get-k8s-info.log": "Namespace: second"})
+    response = client.get("/env/info", params={"file_name": file_location})
+    assert response.json()["namespace"] == "second"
+    stats = client.get("/cache/stats").json()
+    assert stats["misses"] == 2 and stats["l1_hits"] == 0
+
+    copy_name = "test_cache_keys_copy.tgz"
+    shutil.copy(file_location, f"{UPLOAD_DIR}/{copy_name}")
+    try:
+        copy_response = client.get("/env/info", params={"file_name": f"{UPLOAD_DIR}/{copy_name}"})
+        assert copy_response.json() == response.json()
+        assert client.get("/cache/stats").json()["l1_hits"] == 1
+    finally:
+        client.delete(f"/delete/{copy_name}")
+
+def test_pod_log_pages(upload_bundle):
+    """Test that a container log can be read by page, by tail and as an NDJSON stream."""
+    log_lines = [f'{{"level": "info", "message": "line {i}"}}' for i in range(25)]
+    file_location = upload_bundle({
+        "./.get-k8s-info/get-k8s-info.log": "Namespace: viya",
+        "./kubernetes/viya/get/pods.txt": "NAME    READY\npod-a   1/1\n",
+        "./kubernetes/viya/logs/pod-a_main.log": "\n".join(log_lines) + "\n",
+        "./kubernetes/cert-manager/logs/webhook-0_webhook.log": '{"level": "fatal", "message": "no certificate"}\n'
+    })
+    params = {"file_name": file_location, "pod": "pod-a", "container": "main"}
+
+    messages, cursor = [], 0
+    while True:
+        page = client.get("/pod/logs", params={**params, "cursor": cursor, "limit": 10}).json()
+        messages += [line["message"] for line in page["lines"]]
+        cursor = page["next_cursor"]
+        if page["eof"]:
+            break
+    assert messages == [f"line {i}" for i in range(25)]
+
+    tail = client.get("/pod/logs", params={**params, "tail": 3}).json()
+    assert [line["message"] for line in tail["lines"]] == ["line 22", "line 23", "line 24"]
+
+    stream = client.get("/pod/logs/stream", params={**params, "cursor": tail["cursor"]})
+    assert stream.status_code == 200
+    assert len(stream.text.splitlines()) == 3
+
+def test_pod_log_filters(upload_bundle):
+    """Test that a container log can be filtered by time range and minimum level."""
+    levels = ["info", "warn", "error", "debug"]
+    log_lines = [
+        f'{{"timeStamp": "2025-12-15T14:{i:02d}:00Z", "level": "{levels[i % 4]}", "message": "line {i}"}}'
+        for i in range(20)
+    ]
+    file_location = upload_bundle({
+        "./.get-k8s-info/get-k8s-info.log": "Namespace: viya",
+        "./kubernetes/viya/get/pods.txt": "NAME    READY\npod-a   1/1\n",
+        "./kubernetes/viya/logs/pod-a_main.log": "\n".join(log_lines) + "\n",
+        "./kubernetes/cert-manager/logs/webhook-0_webhook.log": '{"level": "fatal", "message": "no certificate"}\n'
+    })
+    params = {"file_name": file_location, "pod": "pod-a", "container": "main"}
+
+    response = client.get("/pod/logs", params={
+        **params, "since": "2025-12-15T14:04:00Z", "until": "2025-12-15T14:11:00Z", "min_level": "WARN"
+    })
+    assert response.status_code == 200
+    assert [line["message"] for line in response.json()["lines"]] == ["line 5", "line 6", "line 9", "line 10"]
+
+    assert client.get("/pod/logs", params={**params, "min_level": "LOUD"}).status_code == 400
+
+    response = client.get("/pod/logs/histogram", params={"file_name": params["file_name"]})
+    assert response.status_code == 200
+    histogram = response.json()
+    assert {"namespace": "viya", "pod": "pod-a", "container": "main", "level": "ERROR", "time": "2025-12-15 14:02:00", "count": 1} in histogram["buckets"]
+    assert histogram["buckets"][0] == {"namespace": "cert-manager", "pod": "webhook-0", "container": "webhook", "level": "FATAL", "time": None, "count": 1}
+    assert histogram["containers"] == [
+        {"namespace": "cert-manager", "pod": "webhook-0", "container": "webhook", "lines": 1, "errors": 1, "error_rate": 1.0},
+        {"namespace": "viya", "pod": "pod-a", "container": "main", "lines": 20, "errors": 5, "error_rate": 0.25}
+    ]
+
+def test_log_index_select_around_untimed_lines():
+    """Test that lines without a timestamp do not stop a time range from being bisected, and never match it."""
+    def make_index(timestamps, levels):
+        count = len(timestamps)
+        return LogIndex("log", array.array("Q", range(count)), array.array("Q", range(1, count + 1)),
+                        array.array("d", timestamps), array.array("b", levels))
+
+    log_index = make_index([10, math.nan, 20, 30, math.nan, 40], [3, 0, 5, 3, 0, 5])
+    assert log_index.sorted
+    assert log_index.select(15, 35) == [2, 3]
+    assert log_index.select(15, None, min_level=5) == [2, 5]
+    assert log_index.select(min_level=3) == [0, 2, 3, 5]
+
+    log_index = make_index([30, math.nan, 10], [3, 3, 3])
+    assert not log_index.sorted
+    assert log_index.select(5, 15) == [2]
+
+def test_pod_log_parsed(upload_bundle):
+    """Test that only well-formed lines below the level are dropped and anything else is kept as text."""
+    log_lines = [
+        '{"timeStamp": "2025-12-15T14:00:00.000Z", "level": "debug", "message": "dropped"}',
+        '{"timeStamp": "2025-12-15T14:01:00.000Z", "level": "debug", "message": "trunc',
+        '{"timeStamp": "2025-12-15T14:02:00.000Z", "message": "nested", "properties": {"level": "debug"}}',
+        'plain text with "level": "info" in it',
+        '{"timeStamp": "2025-12-15T14:03:00.000Z", "level": "warn", "message": "kept", "source": "java"}'
+    ]
+    file_location = upload_bundle({
+        "./.get-k8s-info/get-k8s-info.log": "Namespace: viya",
+        "./kubernetes/viya/get/pods.txt": "NAME    READY\npod-a   1/1\n",
+        "./kubernetes/viya/logs/pod-a_main.log": "\n".join(log_lines) + "\n"
+    })
+    params = {"file_name": file_location, "pod": "pod-a", "container": "main"}
+
+    response = client.get("/pod/logs/parsed", params={**params, "level": "warn"})
+    assert response.status_code == 200
+    assert response.json() == log_lines[1:4] + [{"timeStamp": "2025-12-15 14:03:00", "level": "WARN", "message": "kept"}]
+
+def test_log_search(upload_bundle):
+    """Test that words, phrases and prefixes are found across the container logs, a page at a time."""
+    file_location = upload_bundle({
+        "./.get-k8s-info/get-k8s-info.log": "Namespace: viya",
+        "./kubernetes/viya/get/pods.txt": "NAME    READY\npod-a   1/1\npod-b   1/1\n",
+        "./kubernetes/viya/logs/pod-a_main.log": "starting\nConnection refused by postgres\nready\n",
+        "./kubernetes/viya/logs/pod-b_sidecar.log": '{"level": "error", "message": "refused connection to postgres-0"}\n'
+    })
+
+    response = client.get("/logs/search", params={"file_name": file_location, "query": "postgres*", "limit": 1})
+    assert response.status_code == 200
+    page = response.json()
+    assert page["total"] == 2 and page["next_offset"] == 1
+    assert page["hits"][0]["pod"] == "pod-a" and page["hits"][0]["line_number"] == 2
+
+    response = client.get("/logs/search", params={"file_name": file_location, "query": '"connection refused"'})
+    assert [(hit["container"], hit["line"]) for hit in response.json()["hits"]] == [("main", "Connection refused by postgres")]
+
+    assert client.get("/logs/search", params={"file_name": file_location, "query": " "}).status_code == 400
+
+def test_log_search_spilled_runs(upload_bundle, monkeypatch):
+    """Test that an index merged from many spilled runs is the same file, and that phrases are checked a page at a time."""
+    file_location = upload_bundle({
+        "./.get-k8s-info/get-k8s-info.log": "Namespace: viya",
+        "./kubernetes/viya/get/pods.txt": "NAME    READY\npod-b   1/1\npod-a   1/1\n",
+        "./kubernetes/viya/logs/pod-b_main.log": "".join(f"attempt {i}: connection refused by db-{i % 3}\n" for i in range(40)),
+        "./kubernetes/viya/logs/pod-a_main.log": "refused connection\nconnection refused again\n"
+    })
+
+    response = client.get("/logs/search", params={"file_name": file_location, "query": '"connection refused"', "limit": 1})
+    assert response.status_code == 200
+    page = response.json()
+    # Archive order: pod-b comes first, and the phrase is only checked up to the end of the page.
+    assert page["total"] is None and page["next_offset"] == 1
+    assert page["hits"][0]["pod"] == "pod-b" and page["hits"][0]["line_number"] == 1
+
+    response = client.get("/logs/search", params={"file_name": file_location, "query": '"connection refused" again'})
+    assert response.json()["total"] == 1 and response.json()["hits"][0]["pod"] == "pod-a"
+
+    index_path = log_search.search_index_path(file_location)
+    with open(index_path, "rb") as file_object:
+        built = file_object.read()
+    log_paths = log_search.search_log_paths(file_location, ["kubernetes/viya/logs/pod-a_main.log", "kubernetes/viya/logs/pod-b_main.log"])
+    monkeypatch.setattr(log_search, "LOG_SEARCH_RUN_POSTINGS", 7)
+    log_search.build_search_index(file_location, log_paths, index_path, json.loads(built.split(b"\n")[0])["sha256"])
+    with open(index_path, "rb") as file_object:
+        assert file_object.read() == built
+
+def make_multi_member_tar(tmp_path):
+    """Writes a tar as three gzip members followed by zero padding and returns (path, tar bytes, gzip bytes)."""
+    rng = random.Random(0)
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w") as tar:
+        for i in range(6):
+            data = rng.randbytes(200000 + i * 30000)
+            tarinfo = tarfile.TarInfo(f"./kubernetes/viya/logs/pod-{i}_main.log")
+            tarinfo.size = len(data)
+            tar.addfile(tarinfo, io.BytesIO(data))
+    raw = buffer.getvalue()
+    thirds = [raw[:len(raw) // 3], raw[len(raw) // 3:2 * len(raw) // 3], raw[2 * len(raw) // 3:]]
+    compressed = b"".join(gzip.compress(part) for part in thirds) + b"\x00" * 1024
+    path = tmp_path / "multi_member.tgz"
+    path.write_bytes(compressed)
+    return str(path), raw, compressed
+
+def test_gzip_seeker_random_access(tmp_path):
+    """Test random seeks across gzip members, zero padding and restarts from checkpoints."""
+    path, raw, _ = make_multi_member_tar(tmp_path)
+    rng = random.Random(1)
+    with open(path, "rb") as file_object:
+        seeker = GzipSeeker(file_object, span=4096)
+        assert seeker.read() == raw
+        assert len(seeker.checkpoints) > 5
+
+        for _ in range(200):
+            offset, size = rng.randrange(len(raw)), rng.randrange(1, 90000)
+            seeker.seek(offset)
+            assert seeker.read(size) == raw[offset:offset + size]
+        seeker.seek(len(raw) - 10)
+        assert seeker.read(100) == raw[-10:]
+        assert seeker.read(100) == b""
+
+def test_streaming_index_builder(tmp_path):
+    """Test that the index built while an upload streams in matches the archive and reads members after a reopen."""
+    path, raw, compressed = make_multi_member_tar(tmp_path)
+    builder = StreamingIndexBuilder(compressed=True)
+    builder.start()
+    for start in range(0, len(compressed), 7777):
+        builder.feed(compressed[start:start + 7777])
+    builder.finish()
+    builder.join(timeout=10)
+    assert not builder.is_alive() and builder.error is None
+
+    with tarfile.open(fileobj=io.BytesIO(raw), mode="r:") as tar:
+        assert builder.names == tar.getnames()
+        expected = {member.name: (member.offset_data, member.size) for member in tar}
+    assert builder.members == expected
+
+    with open(path, "rb") as file_object:
+        builder.stream.reopen(file_object)
+        offset, size = builder.members["./kubernetes/viya/logs/pod-4_main.log"]
+        builder.stream.seek(offset)
+        assert builder.stream.read(size) == raw[offset:offset + size]
+
+def test_streaming_index_builder_truncated_upload(tmp_path):
+    """Test that a truncated upload records an error and still drains every chunk, so the uploader never blocks."""
+    _, _, compressed = make_multi_member_tar(tmp_path)
+    builder = StreamingIndexBuilder(compressed=True)
+    builder.start()
+    truncated = compressed[:len(compressed) // 5]
+    # Far more chunks than the queue holds: feed() would block forever if the reader stopped draining.
+    for start in range(0, len(truncated), 1024):
+        builder.feed(truncated[start:start + 1024])
+    builder.finish()
+    builder.join(timeout=10)
+    assert not builder.is_alive()
+    assert builder.error is not None
+    assert builder.reader.finished and not builder.reader.buffer
+
+def test_tar_index_load_rejects_stale_index(tmp_path):
+    """Test that a saved member index is only reused for the same format version and bundle content."""
+    path, _, _ = make_multi_member_tar(tmp_path)
+    index = TarIndex.build(path)
+    index.save()
+    assert TarIndex.load(path).members == index.members
+
+    index_path = TarIndex.index_path(path)
+    with open(index_path, "r") as file_object:
+        saved = json.load(file_object)
+    for field, value in (("version", saved["version"] + 1), ("sha256", "0" * 64)):
+        with open(index_path, "w") as file_object:
+            json.dump({**saved, field: value}, file_object)
+        assert TarIndex.load(path) is None
+    os.remove(index_path)
+
 def test_delete_nonexistent_file():
     """Test that deleting a missing file returns a 400 (due to your assertion)."""
     response = client.delete("/delete/imaginary_file.tgz")
@@ -57,7 +424,102 @@ def test_get_node_status():
     )
     
     assert response.status_code == 200
+
+def test_get_node_capacity(upload_bundle):
+    """Test that pod requests and limits are summed per node, per workload class and for the cluster."""
+    node = ('{"metadata": {"name": "%s", "labels": {"workload.sas.com/class": "compute"}},'
+            ' "status": {"capacity": {"cpu": "8", "memory": "32Gi"}, "allocatable": {"cpu": "8", "memory": "32Gi", "pods": "110"}}}')
+    pod = ('{"metadata": {"name": "%s"}, "spec": {"nodeName": "%s", "containers": [{"name": "main",'
+           ' "resources": {"requests": {"cpu": "500m", "memory": "1Gi"}, "limits": {"cpu": "2", "memory": "2Gi"}}}]},'
+           ' "status": {"phase": "%s"}}')
+    file_location = upload_bundle({
+        "./.get-k8s-info/get-k8s-info.log": "Namespace: viya",
+        "./kubernetes/clusterwide/get/nodes.txt": "NAME     STATUS\nnode-a   Ready\nnode-b   Ready\n",
+        "./kubernetes/clusterwide/json/nodes.json": '{"items": [%s, %s]}' % (node % "node-a", node % "node-b"),
+        "./kubernetes/viya/json/pods.json": '{"items": [%s, %s, %s, %s]}' % (
+            pod % ("pod-a", "node-a", "Running"), pod % ("pod-b", "node-a", "Running"),
+            pod % ("pod-c", "node-a", "Succeeded"), pod % ("pod-d", "", "Pending")
+        ),
+        # Pods of other namespaces use the same nodes; a namespace with only pods.yaml is read from it.
+        "./kubernetes/ingress/json/pods.json": '{"items": [%s]}' % (pod % ("ingress-a", "node-b", "Running")),
+        "./kubernetes/monitoring/yaml/pods.yaml": "items:\n- %s\n" % (pod % ("prometheus-a", "node-b", "Running"))
+    })
+    response = client.get("/node/capacity", params = {"file_name": file_location})
+
+    assert response.status_code == 200
+    capacity = response.json()
+    assert capacity["nodes"]["node-a"]["pods"] == 2
+    assert capacity["nodes"]["node-a"]["cpu_requests"] == 1
+    assert capacity["nodes"]["node-a"]["memory_limits_ratio"] == 0.125
+    assert capacity["nodes"]["node-b"]["pods"] == 2
+    assert capacity["nodes"]["node-b"]["cpu_headroom"] == 7
+    assert capacity["workload_classes"]["compute"]["nodes"] == 2
+    assert capacity["cluster"]["cpu_requests_ratio"] == 2 / 16
+    assert capacity["cluster"]["unscheduled_pods"] == 1
     
+def test_malformed_pods(upload_bundle):
+    """Test that a malformed pod entry is left out and the other pods of the manifest are still served."""
+    file_location = upload_bundle({
+        "./.get-k8s-info/get-k8s-info.log": "Namespace: viya",
+        "./kubernetes/viya/get/pods.txt": "NAME    READY\npod-a   1/1\npod-b   1/1\n",
+        "./kubernetes/viya/json/pods.json": json.dumps({"items": [
+            "not a pod",
+            None,
+            {"metadata": {"name": "pod-a"}, "status": {"containerStatuses": [{"ready": True}, {"name": "main"}]}},
+            {"metadata": {"name": "pod-c"}, "status": {"containerStatuses": [{"name": "main", "restartCount": "many"}]}},
+            {"metadata": {"name": "pod-b", "ownerReferences": ["bad"]}, "spec": {"containers": "bad", "volumes": [3]},
+             "status": {"initContainerStatuses": [{"name": "init"}], "containerStatuses": [{"name": "main"}]}}
+        ]})
+    })
+    response = client.get("/pod/containers", params={"file_name": file_location})
+
+    assert response.status_code == 200
+    assert response.json() == {"pod-a": ["main"], "pod-b": ["init", "main"]}
+
+def test_manifest_yaml_documents():
+    """Test that every document of a YAML manifest is read, whether a List, a plain list or a single object."""
+    pods = [{"metadata": {"name": f"pod-{i}"}, "spec": {"containers": [{"name": "main"}]}} for i in range(3)]
+    pod_list = "apiVersion: v1\nitems:\n" + "".join(
+        f"- metadata:\n    name: {pod['metadata']['name']}\n  spec:\n    containers:\n    - name: main\n" for pod in pods
+    ) + "kind: List\n"
+
+    def read(text):
+        return list(manifest_reader.iter_manifest_items("pods.yaml", io.BytesIO(text.encode())))
+
+    assert read(pod_list) == pods
+    assert read("---\n" + pod_list + "---\nkind: Pod\nmetadata:\n  name: pod-3\n...\n") == pods + [{"kind": "Pod", "metadata": {"name": "pod-3"}}]
+    assert read("- metadata: {name: pod-0}\n  spec: {containers: [{name: main}]}\n---\n" + pod_list) == pods[:1] + pods
+    assert read("items: []\nkind: List\n") == []
+
+def test_manifest_json_chunks(monkeypatch):
+    """Test that JSON items cut anywhere by the end of a read, even inside a number or a character, are decoded whole."""
+    items = [{"metadata": {"name": "pod-é€"}, "spec": {"cpu": 1.5e3, "weights": [-2.5E-3, 10, None, True]}} for _ in range(4)]
+    monkeypatch.setattr(manifest_reader, "MANIFEST_READ_SIZE", 3)
+    for document in ({"apiVersion": "v1", "items": items, "kind": "List"}, items):
+        content = json.dumps(document, ensure_ascii=False, indent=1).encode()
+        assert list(manifest_reader.iter_manifest_items("pods.json", io.BytesIO(content))) == items
+
+def test_ingest_skips_yaml_with_json(upload_bundle, monkeypatch):
+    """Test that the YAML form of a manifest is not handed to the parsers when its JSON form is in the bundle."""
+    pods_yaml = "items:\n- metadata:\n    name: from-yaml\n"
+    file_location = upload_bundle({
+        "./.get-k8s-info/get-k8s-info.log": "Namespace: viya",
+        "./kubernetes/viya/yaml/pods.yaml": pods_yaml,
+        "./kubernetes/viya/json/pods.json": '{"items": [{"metadata": {"name": "from-json"}}]}',
+        "./kubernetes/other/yaml/pods.yaml": pods_yaml
+    })
+    parsed_paths = []
+    parse_resource_type = snapshot_module.parse_resource_type
+
+    def record_members(members):
+        parsed_paths.extend(path for path, _ in members)
+        return parse_resource_type(members)
+
+    monkeypatch.setattr(snapshot_module, "parse_resource_type", record_members)
+    snapshot = snapshot_module.ingest_bundle(file_location)
+    assert "kubernetes/viya/yaml/pods.yaml" not in parsed_paths
+    assert [pod.name for pod in snapshot.get_all_pods()] == ["from-json", "from-yaml"]
+
 def test_get_node_output():
     params = {
         "file_name": TEST_FILE_NAME
@@ -92,7 +554,93 @@ def test_get_resource_describe():
     )
     
     assert response.status_code == 200
-    
+
+def test_get_resource_describe_object(upload_bundle):
+    """Test that one object is cut out of a describe output by its name, for any resource and for nodes."""
+    file_location = upload_bundle({
+        "./.get-k8s-info/get-k8s-info.log": "Namespace: viya",
+        "./kubernetes/viya/get/pods.txt": "NAME    READY\npod-a   1/1\npod-b   1/1\n",
+        "./kubernetes/viya/describe/pods.txt": (
+            "Name:         pod-a\nStatus:       Running\n\nName:         pod-b\nStatus:       Pending\n"
+        ),
+        "./kubernetes/clusterwide/get/nodes.txt": "NAME     STATUS\nnode-a   Ready\n",
+        "./kubernetes/clusterwide/describe/nodes.txt": "Name:               node-a\nRoles:              <none>\n"
+    })
+    params = {"file_name": file_location}
+
+    describe = client.get("/resource/describe", params = {**params, "resource_name": "pods"}).json()
+    response = client.get("/resource/describe/pods/pod-b", params = params)
+    assert response.status_code == 200
+    assert response.json() == describe["pod-b"]
+    assert response.json()["Status"].strip() == "Status:       Pending"
+    assert client.get("/resource/describe/pods/no-such-pod", params = params).status_code == 400
+
+    response = client.get("/node/describe/node-a", params = params)
+    assert response.status_code == 200
+    assert response.json()["Roles"].strip() == "Roles:              <none>"
+    assert client.get("/node/describe/no-such-node", params = params).status_code == 400
+
+def test_get_resource_status_columns(upload_bundle):
+    """Test that empty cells and values with double spaces stay in their column."""
+    file_location = upload_bundle({
+        "./.get-k8s-info/get-k8s-info.log": "Namespace: viya",
+        "./kubernetes/viya/get/configmaps.txt": (
+            "NAME   DATA   DESCRIPTION          AGE\n"
+            "cm-a   1      two  spaces here     5d\n"
+            "cm-b          empty data cell      6d\n"
+        )
+    })
+    response = client.get(
+        "/resource/status",
+        params = {"file_name": file_location, "resource_name": "configmaps"}
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "cm-a": {"DATA": "1", "DESCRIPTION": "two  spaces here", "AGE": "5d"},
+        "cm-b": {"DATA": "", "DESCRIPTION": "empty data cell", "AGE": "6d"}
+    }
+
+def test_get_available_resource_types_order(upload_bundle):
+    """Test that resource types are listed in archive order, whatever order they were parsed in."""
+    file_location = upload_bundle({
+        "./.get-k8s-info/get-k8s-info.log": "Namespace: viya",
+        "./kubernetes/viya/get/pods.txt": "NAME    READY\npod-a   1/1\n" * 50,
+        "./kubernetes/viya/get/configmaps.txt": "NAME   DATA\ncm-a   1\n",
+        "./kubernetes/viya/get/deployments.txt": "NAME      READY\ndeploy-a   1/1\n" * 5,
+        "./kubernetes/viya/get/persistentvolumeclaims.txt": "NAME     STATUS\ndata-a   Bound\n" * 20
+    })
+    response = client.get("/resource/avail_types", params = {"file_name": file_location})
+
+    assert response.status_code == 200
+    assert response.json() == ["pods", "configmaps", "deployments", "persistentvolumeclaims"]
+
+def test_get_node_status_quantities(upload_bundle):
+    """Test that memory is converted from any unit and a node without allocated resources shifts no other node."""
+    node = '{"metadata": {"name": "%s"}, "status": {"capacity": {"memory": "%s"}, "allocatable": {"memory": "%s"}}}'
+    file_location = upload_bundle({
+        "./.get-k8s-info/get-k8s-info.log": "Namespace: viya",
+        "./kubernetes/clusterwide/json/nodes.json": '{"items": [%s, %s]}' % (
+            node % ("node-a", "4Gi", "3Gi"), node % ("node-b", "2048Mi", "2097152Ki")
+        ),
+        "./kubernetes/clusterwide/get/nodes.txt": "NAME     STATUS\nnode-a   Ready\nnode-b   Ready\n",
+        "./kubernetes/clusterwide/describe/nodes.txt": (
+            "Name:               node-a\nNon-terminated Pods:          (3 in total)\nEvents:              <none>\n\n"
+            "Name:               node-b\nNon-terminated Pods:          (5 in total)\n"
+            "Allocated resources:\n  Resource           Requests      Limits\n"
+            "  cpu                3350m (42%)   12 (151%)\n  memory             1Gi (50%)     2Gi (100%)\n"
+        )
+    })
+    response = client.get("/node/status", params = {"file_name": file_location})
+
+    assert response.status_code == 200
+    node_status = response.json()
+    assert node_status["node-a"]["memory_capacity_gi"] == "4 Gi"
+    assert node_status["node-b"]["memory_allocatable_gi"] == "2 Gi"
+    assert node_status["node-a"]["resources"]["cpu_requests"] == "N/A"
+    assert node_status["node-b"]["resources"]["cpu_requests_cores"] == 3.35
+    assert node_status["node-b"]["resources"]["memory_limits_bytes"] == 2 * 1024 ** 3
+
 def test_get_resource():
     params = {
         "file_name": TEST_FILE_NAME,
@@ -151,6 +699,38 @@ def test_get_pv_describe():
     
     assert response.status_code == 200
 
+def test_get_relationships(upload_bundle):
+    """Test the links between pods, their node, PVC, PV and owners, and the PV describe built on them."""
+    pod = ('{"metadata": {"name": "%s", "ownerReferences": [{"kind": "ReplicaSet", "name": "app-7d8c", "controller": true}]},'
+           ' "spec": {"nodeName": "node-a", "volumes": [{"name": "data", "persistentVolumeClaim": {"claimName": "%s"}}]}}')
+    file_location = upload_bundle({
+        "./.get-k8s-info/get-k8s-info.log": "Namespace: viya",
+        "./kubernetes/viya/json/pods.json": '{"items": [%s, %s]}' % (pod % ("app-7d8c-a", "data-a"), pod % ("app-7d8c-b", "data-b")),
+        "./kubernetes/viya/get/persistentvolumeclaims.txt": (
+            "NAME     STATUS    VOLUME     CAPACITY\ndata-a   Bound     pvc-0001   10Gi\n"
+            "data-b   Pending                   \ndata-c   Bound     pvc-0003   5Gi\n"
+        ),
+        "./kubernetes/viya/describe/replicasets.txt": "Name:           app-7d8c\nControlled By:  Deployment/app\n",
+        "./kubernetes/clusterwide/get/persistentvolumes.txt": "NAME       CAPACITY\npvc-0001   10Gi\n",
+        "./kubernetes/clusterwide/describe/persistentvolumes.txt": "Name:            pvc-0001\nStatus:          Bound\n"
+    })
+    params = {"file_name": file_location}
+
+    response = client.get("/relationships/nodes/node-a", params = params)
+    assert response.status_code == 200
+    assert response.json()["neighbors"] == {"pods": ["app-7d8c-a", "app-7d8c-b"]}
+    pod_neighbors = client.get("/relationships/po/app-7d8c-a", params = params).json()["neighbors"]
+    assert pod_neighbors == {"nodes": ["node-a"], "persistentvolumeclaims": ["data-a"], "replicasets": ["app-7d8c"]}
+    deployment = client.get("/relationships/replicasets/app-7d8c", params = {**params, "neighbor_kind": "deploy"}).json()
+    assert deployment["neighbors"] == {"deployments": ["app"]}
+    assert client.get("/relationships/pvc/data-a", params = params).json()["neighbors"]["persistentvolumes"] == ["pvc-0001"]
+    assert client.get("/relationships/pods/no-such-pod", params = params).status_code == 400
+
+    pv_describe = client.get("/pvc/describe_pv", params = params).json()
+    assert pv_describe["data-a"]["Status"].strip() == "Status:          Bound"
+    assert pv_describe["data-b"] == "Not found"
+    assert pv_describe["data-c"] == "Not found"
+
 def test_get_pod_containers():
     params = {
         "file_name": TEST_FILE_NAME
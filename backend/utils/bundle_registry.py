@@ -0,0 +1,201 @@
+# bundle_registry.py
+
+import os
+import json
+import stat
+import hashlib
+import tempfile
+import threading
+
+from collections import OrderedDict
+
+from utils.conf import ARTIFACT_DIR
+
+DIGEST_CHUNK_SIZE = 1024 * 1024
+
+digests = {}  # bundle_key -> sha256 of the bundle content
+private_artifact_dirs = []  # used instead of ARTIFACT_DIR when that one cannot be trusted
+private_artifact_dir_lock = threading.Lock()
+
+
+def bundle_key(path):
+    """Identifies a bundle file by its real path, size and mtime, so a re-uploaded file gets a new key."""
+    stat = os.stat(path)
+    return (os.path.realpath(path), stat.st_size, stat.st_mtime_ns)
+
+
+def is_own_file(stat_result):
+    """Owned by this user and writable by no one else."""
+    return stat_result.st_uid == os.geteuid() and not stat_result.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+
+def artifact_dir():
+    """
+    The directory of the derived files, created private (0o700). Snapshots are unpickled from it,
+    so a directory under /tmp that another user created, or can write to, is never used: this
+    instance then keeps its files in a private temporary directory instead.
+    """
+    try:
+        os.makedirs(ARTIFACT_DIR, mode=0o700, exist_ok=True)
+        stat_result = os.lstat(ARTIFACT_DIR)
+        if stat.S_ISDIR(stat_result.st_mode) and is_own_file(stat_result):
+            if stat_result.st_mode & 0o077:
+                os.chmod(ARTIFACT_DIR, 0o700)
+            return ARTIFACT_DIR
+        print(f"Error occurred in bundle_registry > artifact_dir : {ARTIFACT_DIR} is not a private directory of this user")
+    except OSError as e:
+        print(f"Error occurred in bundle_registry > artifact_dir : {e}")
+
+    with private_artifact_dir_lock:
+        if not private_artifact_dirs:
+            private_artifact_dirs.append(tempfile.mkdtemp(prefix="k8s-visualizer-"))
+    return private_artifact_dirs[0]
+
+
+def artifact_path(name):
+    """Location of a derived file (index, snapshot, ...) in the artifact directory."""
+    return os.path.join(artifact_dir(), name)
+
+
+def is_own_artifact(file_object):
+    """Only artifacts this user wrote are read back."""
+    return is_own_file(os.fstat(file_object.fileno()))
+
+
+def digest_record_path(path):
+    path_hash = hashlib.sha256(os.path.realpath(path).encode()).hexdigest()
+    return artifact_path(f"{path_hash}.sha256.json")
+
+
+def save_bundle_digest(path, digest):
+    """Records the content hash of a bundle, e.g. the one computed while it was uploaded."""
+    key = bundle_key(path)
+    digests[key] = digest
+    try:
+        with open(digest_record_path(path), "w") as file_object:
+            json.dump({"path": key[0], "size": key[1], "mtime_ns": key[2], "sha256": digest}, file_object)
+    except OSError as e:
+        print(f"Error occurred in bundle_registry > save_bundle_digest : {e}")
+
+
+def bundle_digest(path):
+    """
+    Identifies a bundle by the SHA-256 of its content, so identical bundles share every
+    cache entry and artifact whatever their name. Hashed at most once per file version.
+    """
+    key = bundle_key(path)
+    if key in digests:
+        return digests[key]
+
+    try:
+        with open(digest_record_path(path), "r") as file_object:
+            record = json.load(file_object)
+        if (record.get("path"), record.get("size"), record.get("mtime_ns")) == key:
+            digests[key] = record["sha256"]
+            return digests[key]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as file_object:
+        for chunk in iter(lambda: file_object.read(DIGEST_CHUNK_SIZE), b""):
+            sha256.update(chunk)
+    save_bundle_digest(path, sha256.hexdigest())
+    return digests[key]
+
+
+def forget_bundle_digest(path):
+    record_path = digest_record_path(path)
+    if os.path.exists(record_path):
+        os.remove(record_path)
+
+
+class BundleRegistry:
+    """
+    Process-wide, thread-safe LRU of objects built once per bundle.
+    `factory(path)` builds a missing entry, `on_evict(value)` releases one that falls out,
+    and `key_func(path)` decides which paths share an entry.
+    """
+    def __init__(self, factory, max_size, on_evict=None, key_func=bundle_key):
+        self.factory = factory
+        self.max_size = max_size
+        self.on_evict = on_evict
+        self.key_func = key_func
+        self.entries = OrderedDict()
+        self.path_keys = {}  # real path -> key it last resolved to
+        self.lock = threading.Lock()
+        self.build_locks = {}
+
+    def key(self, path):
+        return self.key_func(path)
+
+    def get(self, path):
+        key = self.key(path)
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key]
+            build_lock = self.build_locks.setdefault(key, threading.Lock())
+
+        # Only one thread builds a given bundle; the others wait and reuse its result.
+        with build_lock:
+            with self.lock:
+                if key in self.entries:
+                    self.entries.move_to_end(key)
+                    return self.entries[key]
+            try:
+                value = self.factory(path)
+                self.put(path, key, value)
+            finally:
+                with self.lock:
+                    self.build_locks.pop(key, None)
+        return value
+
+    def lookup(self, key):
+        """Returns the entry for `key` without building it, or None."""
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key]
+        return None
+
+    def put(self, path, key, value):
+        evicted = []
+        with self.lock:
+            # The previous version of a re-uploaded file can never be requested again.
+            real_path = os.path.realpath(path)
+            previous_key = self.path_keys.get(real_path)
+            self.path_keys[real_path] = key
+            evicted.extend(self._drop_unreferenced(previous_key, key))
+
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                evicted.append(self.entries.popitem(last=False)[1])
+
+        if self.on_evict:
+            for stale_value in evicted:
+                self.on_evict(stale_value)
+
+    def discard(self, path):
+        """Drops the entry of a bundle once it is deleted, unless another path still shares it."""
+        with self.lock:
+            key = self.path_keys.pop(os.path.realpath(path), None)
+            evicted = self._drop_unreferenced(key)
+        if self.on_evict:
+            for stale_value in evicted:
+                self.on_evict(stale_value)
+
+    def _drop_unreferenced(self, key, current_key=None):
+        if key is None or key == current_key or key in self.path_keys.values() or key not in self.entries:
+            return []
+        return [self.entries.pop(key)]
+
+    def clear(self):
+        with self.lock:
+            evicted = list(self.entries.values())
+            self.entries.clear()
+            self.path_keys.clear()
+        if self.on_evict:
+            for stale_value in evicted:
+                self.on_evict(stale_value)
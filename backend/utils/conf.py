@@ -1 +1,17 @@
-CACHE_TIMEOUT = 60 * 10 # 60 seconds x 10 = 10 minutes
\ No newline at end of file
+import os
+
+CACHE_TIMEOUT = 60 * 10 # 60 seconds x 10 = 10 minutes
+GZIP_CHECKPOINT_SPAN = 1024 * 1024 * 8 # Keep a gzip seek checkpoint every 8 MiB of decompressed data
+TAR_REGISTRY_SIZE = 8 # Number of bundles kept open by the shared TarController registry
+SNAPSHOT_REGISTRY_SIZE = 4 # Number of parsed bundle snapshots kept in memory
+EXECUTOR_IO_WORKERS = 16 # Threads for archive reads and building responses
+EXECUTOR_CPU_WORKERS = os.cpu_count() or 2 # Processes for parsing bundles
+MAX_CONCURRENT_PARSES = 2 # Bundles parsed at the same time across the server
+MAX_PARSES_PER_BUNDLE = 1 # Parses of the same bundle at the same time
+ARTIFACT_DIR = "/tmp/k8s-visualizer" # Indexes and parsed snapshots, named by the SHA-256 of the bundle
+CACHE_L1_MAX_BYTES = 1024 * 1024 * 256 # In-process response cache in front of Redis
+LOG_INDEX_CACHE_SIZE = 32 # Container log indexes kept in memory
+LOG_SEARCH_REGISTRY_SIZE = 2 # Full-text log search indexes kept in memory
+MANIFEST_READ_SIZE = 1024 * 1024 # Bytes of a nodes/pods manifest read and decoded at a time
+WARMUP_JOB_TTL = 60 * 60 # Seconds a finished warm-up job can still be polled
+LOG_SEARCH_RUN_POSTINGS = 1024 * 1024 * 2 # (token, line) pairs a log search index build holds before spilling them to disk
\ No newline at end of file
@@ -0,0 +1,122 @@
+# executor.py
+
+import asyncio
+import functools
+import multiprocessing
+
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from utils.conf import EXECUTOR_IO_WORKERS, EXECUTOR_CPU_WORKERS, MAX_CONCURRENT_PARSES, MAX_PARSES_PER_BUNDLE
+from utils.snapshot import snapshot_registry, load_or_ingest_bundle, pinned_snapshot
+from utils.log_search import search_registry, build_search_index, load_search_index, search_index_path, search_log_paths
+from utils.log_index import unindexed_logs, build_log_indexes
+from utils.bundle_registry import bundle_digest
+
+io_executor = ThreadPoolExecutor(max_workers=EXECUTOR_IO_WORKERS, thread_name_prefix="k8s-visualizer-io")
+cpu_executor = None
+
+parse_semaphore = asyncio.Semaphore(MAX_CONCURRENT_PARSES)
+bundle_semaphores = {}  # bundle digest -> [semaphore, number of requests holding or waiting for it]
+
+
+def get_cpu_executor():
+    """The process pool is created on first use, and with spawn so worker threads are never forked."""
+    global cpu_executor
+    if cpu_executor is None:
+        cpu_executor = ProcessPoolExecutor(max_workers=EXECUTOR_CPU_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return cpu_executor
+
+
+async def run_io(func, *args, **kwargs):
+    """Runs blocking archive reads and response building in the thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(io_executor, functools.partial(func, *args, **kwargs))
+
+
+@asynccontextmanager
+async def parse_slot(digest):
+    """Limits parses per bundle and across the server. Keyed by content, like the snapshots, so copies share a slot."""
+    entry = bundle_semaphores.setdefault(digest, [asyncio.Semaphore(MAX_PARSES_PER_BUNDLE), 0])
+    entry[1] += 1
+    try:
+        async with entry[0], parse_semaphore:
+            yield
+    finally:
+        entry[1] -= 1
+        if entry[1] == 0:
+            bundle_semaphores.pop(digest, None)
+
+
+async def ensure_snapshot(tgz_path):
+    """Loads the parsed snapshot of the bundle into the registry without blocking the event loop, and returns it."""
+    key = await run_io(snapshot_registry.key, tgz_path)
+    snapshot = snapshot_registry.lookup(key)
+    if snapshot is not None:
+        return snapshot
+
+    async with parse_slot(key):
+        # Another request may have parsed the bundle while this one waited for its turn.
+        snapshot = snapshot_registry.lookup(key)
+        if snapshot is not None:
+            return snapshot
+        # The archive is decompressed in a thread; the parsing fans out over the process pool.
+        snapshot = await run_io(load_or_ingest_bundle, tgz_path, get_cpu_executor())
+        snapshot_registry.put(tgz_path, key, snapshot)
+        return snapshot
+
+
+def build_resource(resource_class, snapshot, file_name, *args):
+    with pinned_snapshot(file_name, snapshot):
+        return resource_class(file_name, *args)
+
+
+async def load_resource(resource_class, file_name, *args):
+    """
+    Builds a resource object once its bundle has been parsed off the event loop. The resource is
+    built from the snapshot ensure_snapshot returned, so an eviction in between never re-ingests
+    the bundle on the I/O thread.
+    """
+    snapshot = await ensure_snapshot(file_name)
+    return await run_io(build_resource, resource_class, snapshot, file_name, *args)
+
+
+async def ensure_search_index(tgz_path):
+    """
+    Returns the log search index of the bundle. A missing one is built once, in the process pool and
+    under the parse slot of the bundle, and saved; the request then maps the saved file.
+    """
+    snapshot = await ensure_snapshot(tgz_path)
+    key = await run_io(search_registry.key, tgz_path)
+    search_index = search_registry.lookup(key)
+    if search_index is not None:
+        return search_index
+
+    async with parse_slot(key):
+        search_index = search_registry.lookup(key) or await run_io(load_search_index, tgz_path)
+        if search_index is None:
+            log_paths = await run_io(search_log_paths, tgz_path, snapshot.log_members)
+            index_path = await run_io(search_index_path, tgz_path)
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(get_cpu_executor(), functools.partial(build_search_index, tgz_path, log_paths, index_path, key))
+            search_index = await run_io(load_search_index, tgz_path)
+            assert search_index is not None, "The log search index could not be built"
+        search_registry.put(tgz_path, key, search_index)
+    return search_index
+
+
+async def ensure_log_indexes(tgz_path, log_paths):
+    """
+    Builds the missing indexes of the container logs `log_paths` in one worker of the process pool,
+    in archive order and under the parse slot of the bundle, so requests then load them from disk.
+    """
+    key = await run_io(bundle_digest, tgz_path)
+    if not await run_io(unindexed_logs, tgz_path, log_paths):
+        return
+
+    async with parse_slot(key):
+        # Another request may have built them while this one waited for its turn.
+        missing = await run_io(unindexed_logs, tgz_path, log_paths)
+        if missing:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(get_cpu_executor(), functools.partial(build_log_indexes, tgz_path, missing, key))
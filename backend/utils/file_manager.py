@@ -2,23 +2,90 @@
 
 import os
 import time
-import shutil
+import zlib
+import hashlib
+
+from utils.executor import run_io
+from utils.bundle_registry import bundle_key, save_bundle_digest, forget_bundle_digest
+from utils.snapshot import snapshot_registry
+from utils.tar_index import StreamingIndexBuilder, GzipSeeker, GZIP_MAGIC
+from utils.tar_controller import TarController, tar_registry
+from utils.log_search import search_registry
 
 
 UPLOAD_DIR = '/tmp'
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+TAR_MAGIC_OFFSET = 257
 
-def upload_file(file):
+def validate_bundle_header(head):
     """
-    Receives a .tgz file, saves it to /tmp, and measures duration.
+    Checks the first chunk of an upload before anything is written.
+    Returns True for a gzip compressed tar and False for a plain tar.
+    """
+    if head[:2] == GZIP_MAGIC:
+        try:
+            tar_head = zlib.decompressobj(zlib.MAX_WBITS | 16).decompress(head, TAR_MAGIC_OFFSET + 5)
+        except zlib.error as e:
+            raise AssertionError(f"The uploaded file is not a valid gzip file: {e}")
+        assert len(tar_head) < TAR_MAGIC_OFFSET + 5 or tar_head[TAR_MAGIC_OFFSET:].startswith(b"ustar"), \
+            "The uploaded file is not a .tgz archive"
+        return True
+
+    assert head[TAR_MAGIC_OFFSET:TAR_MAGIC_OFFSET + 5] == b"ustar", "The uploaded file is not a .tgz archive"
+    return False
+
+def write_chunk(file_object, sha256, chunk):
+    sha256.update(chunk)
+    file_object.write(chunk)
+
+async def upload_file(file):
+    """
+    Streams a .tgz file to /tmp chunk by chunk without blocking the event loop.
+    The SHA-256 and the member index are computed from the same chunks as they are written,
+    so the bundle is ready to query as soon as the upload finishes.
     """
     start_time = time.perf_counter()
 
     os.makedirs(UPLOAD_DIR, exist_ok=True)
     file_location = f"{UPLOAD_DIR}/{file.filename}"
-    
-    with open(file_location, "wb+") as file_object:
-        shutil.copyfileobj(file.file, file_object)
-        
+    partial_location = f"{file_location}.part"
+
+    chunk = await file.read(UPLOAD_CHUNK_SIZE)
+    compressed = validate_bundle_header(chunk)
+
+    sha256 = hashlib.sha256()
+    builder = StreamingIndexBuilder(compressed)
+    builder.start()
+    file_object = await run_io(open, partial_location, "wb")
+    try:
+        while chunk:
+            await run_io(write_chunk, file_object, sha256, chunk)
+            await run_io(builder.feed, chunk)
+            assert builder.error is None, f"The uploaded file is not a valid .tgz archive: {builder.error}"
+            chunk = await file.read(UPLOAD_CHUNK_SIZE)
+
+        await run_io(builder.finish)
+        await run_io(builder.join)
+        assert builder.error is None, f"The uploaded file is not a valid .tgz archive: {builder.error}"
+    except BaseException:
+        if builder.is_alive():
+            await run_io(builder.finish)
+        await run_io(file_object.close)
+        os.remove(partial_location)
+        raise
+
+    await run_io(file_object.close)
+    os.replace(partial_location, file_location)
+    await run_io(save_bundle_digest, file_location, sha256.hexdigest())
+
+    # The index is saved against the final file, then its reader joins the shared registry
+    # with the gzip checkpoints recorded while streaming.
+    index = builder.build_index(file_location)
+    await run_io(index.save)
+    seeker = builder.stream if isinstance(builder.stream, GzipSeeker) else None
+    tar_controller = await run_io(TarController, file_location, seeker)
+    tar_registry.put(file_location, bundle_key(file_location), tar_controller)
+
     end_time = time.perf_counter()
     
     duration = end_time - start_time
@@ -27,6 +94,8 @@ def upload_file(file):
         "info": f"File '{file.filename}' saved at '{file_location}'",
         "content_type": file.content_type,
         "upload_time_seconds": round(duration, 4),
+        "sha256": sha256.hexdigest(),
+        "indexed": True,
         "file_location": file_location
     }
     
@@ -39,5 +108,10 @@ def delete_file(filename: str):
 
     assert os.path.exists(file_location), f"File '{filename}' not found."
 
+    tar_registry.discard(file_location)
+    snapshot_registry.discard(file_location)
+    search_registry.discard(file_location)
+    # The index and snapshot are keyed by content and may be shared with another upload, so they are kept.
+    forget_bundle_digest(file_location)
     os.remove(file_location)
     return {"message": f"File '{filename}' deleted successfully."}
\ No newline at end of file
@@ -1,9 +1,37 @@
 # log_controller.py
 
+import re
 import json
+import orjson
 
 from utils.utils import format_timestamp
 
+# A valid time of day, so only the day, the fraction length and the offset decide whether fromisoformat accepts it.
+TIMESTAMP_PATTERN = re.compile(r"(?a)(\d{4}-\d{2}-\d{2})([T ])((?:[01]\d|2[0-3]):[0-5]\d:[0-5]\d)(\.\d*)?(Z|[+-]\d{2}:?\d{2})?")
+
+
+def format_timestamps(timestamps):
+    """
+    Same output as format_timestamp for every value, without parsing a datetime per line.
+    A value is cut to "date time" directly once a value of the same day, separator, fraction
+    length and offset was checked against format_timestamp; anything else goes through it.
+    """
+    checked_shapes = {}
+    formatted = []
+    for timestamp in timestamps:
+        match = TIMESTAMP_PATTERN.fullmatch(timestamp)
+        if match is None:
+            formatted.append(format_timestamp(timestamp))
+            continue
+
+        date, separator, time, fraction, offset = match.groups()
+        shape = (date, separator, len(fraction or ""), offset)
+        if shape not in checked_shapes:
+            checked_shapes[shape] = format_timestamp(timestamp) == f"{date} {time}"
+        formatted.append(f"{date} {time}" if checked_shapes[shape] else format_timestamp(timestamp))
+    return formatted
+
+
 class LogController:
     def __init__(self, log_text, requested_items=['timeStamp', 'level', 'message'], requested_level="info"):
         if log_text == None:
@@ -22,7 +50,7 @@ class LogController:
                 "source": 7,
                 "version": 8
             }
-            
+
             self.logger_precedence = {
                 'TRACE': 1,
                 'DEBUG': 2,
@@ -31,24 +59,73 @@ class LogController:
                 'ERROR': 5,
                 'FATAL': 6
             }
-    
+
+    def get_log_key(self, available_items):
+        """Requested items present in a line, in output order."""
+        requested_order = {item: i for i, item in enumerate(self.requested_items)}
+        log_key = [item for item in available_items if item in requested_order]
+        log_key.sort(key=lambda x: (self.log_output_order.get(x, 99), requested_order[x]))
+        return log_key
+
     def parse_log(self):
+        """
+        Keeps the lines at the requested level or above with the requested items, in output order.
+        Lines that are not structured logs are returned as they are.
+
+        A line is only dropped once it has been decoded and its own top level "level" is below the
+        requested one. There is no check on the raw bytes before that: finding a low level in the
+        text does not prove the line is a well-formed object with that level at the top, and
+        proving it costs as much as decoding with orjson. The precedence of each level as written,
+        the item order of each set of keys and the timestamps are worked out once instead of per line.
+        """
+        minimum_precedence = self.logger_precedence.get(self.requested_level.upper())
+        level_precedences = {}  # level as written -> (upper-cased level, precedence)
+        log_keys = {}  # keys of a line -> requested items in output order
         parsed_logs = []
+        selected_with_timestamp = []
+        unparsed_lines = 0
+
         for line in self.log_text.split('\n'):
-            if line:
+            if not line:
+                continue
+
+            try:
                 try:
+                    line_json = orjson.loads(line)
+                except orjson.JSONDecodeError:
+                    # orjson is stricter than json (NaN, very large integers); those lines take the slow path.
                     line_json = json.loads(line)
-                    if self.logger_precedence[line_json['level'].upper()] >= self.logger_precedence[self.requested_level.upper()]:   
-                        self.available_items = list(line_json.keys())
-                        log_key = list(set(self.available_items) & set(self.requested_items))
-                        log_key.sort(key=lambda x: self.log_output_order.get(x, 99))
-                        line_json['level'] = line_json['level'].upper()
-                        line_json['timeStamp'] = format_timestamp(line_json['timeStamp'])
-                        selected_log_objects = {key: line_json[key] for key in log_key if key in line_json}
-                        parsed_logs.append(selected_log_objects)
-                
-                except Exception as e:
-                    print(f"Error occurred in LogController > parse_log : {e}")
-                    parsed_logs.append(line)
-            
-        return parsed_logs
\ No newline at end of file
+                level = line_json['level']
+                level_precedence = level_precedences.get(level)
+                if level_precedence is None:
+                    level_precedence = level_precedences[level] = (level.upper(), self.logger_precedence[level.upper()])
+                if minimum_precedence is None:
+                    raise KeyError(self.requested_level)
+                if level_precedence[1] < minimum_precedence:
+                    continue
+                if not isinstance(line_json['timeStamp'], str):
+                    raise TypeError("timeStamp is not a string")
+
+                available_items = tuple(line_json)
+                log_key = log_keys.get(available_items)
+                if log_key is None:
+                    log_key = log_keys[available_items] = self.get_log_key(available_items)
+
+                line_json['level'] = level_precedence[0]
+                selected_log_objects = {key: line_json[key] for key in log_key}
+                parsed_logs.append(selected_log_objects)
+                if 'timeStamp' in selected_log_objects:
+                    selected_with_timestamp.append(selected_log_objects)
+
+            except Exception:
+                unparsed_lines += 1
+                parsed_logs.append(line)
+
+        formatted_timestamps = format_timestamps([selected['timeStamp'] for selected in selected_with_timestamp])
+        for selected_log_objects, formatted_timestamp in zip(selected_with_timestamp, formatted_timestamps):
+            selected_log_objects['timeStamp'] = formatted_timestamp
+
+        if unparsed_lines:
+            print(f"Error occurred in LogController > parse_log : {unparsed_lines} lines are not structured logs")
+
+        return parsed_logs
@@ -0,0 +1,253 @@
+# log_index.py
+
+import os
+import json
+import math
+import array
+import bisect
+import hashlib
+import threading
+
+from datetime import datetime, timezone
+from collections import Counter, OrderedDict
+
+from utils.conf import LOG_INDEX_CACHE_SIZE
+from utils.bundle_registry import artifact_path, bundle_digest
+from utils.tar_controller import normalize_member_name, get_tar_controller
+from utils.log_reader import LogReader, parse_log_line
+
+LOG_INDEX_VERSION = 1
+LOG_INDEX_SUFFIX = ".logidx"
+
+LOG_LEVELS = {
+    'TRACE': 1,
+    'DEBUG': 2,
+    'INFO': 3,
+    'WARN': 4,
+    'ERROR': 5,
+    'FATAL': 6
+}
+
+log_indexes = OrderedDict()  # (bundle sha256, log path) -> LogIndex
+log_indexes_lock = threading.Lock()
+
+
+def parse_timestamp(value):
+    """Returns an ISO 8601 timestamp as epoch seconds, naive ones taken as UTC, or None."""
+    try:
+        parsed = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+class LogIndex:
+    """
+    Byte range, timestamp and level of every non-empty line of one container log, so a time range
+    or a minimum level is answered from the arrays and only the matching lines are read.
+    Lines without a timestamp hold NaN and lines without a known level hold 0.
+    """
+    def __init__(self, log_path, offsets, ends, timestamps, levels):
+        self.log_path = log_path
+        self.offsets = offsets
+        self.ends = ends
+        self.timestamps = timestamps
+        self.levels = levels
+        # Logs are written in time order, apart from lines without a timestamp (stack traces, banners).
+        # The lines that have one are kept aside, so a time range is still found by bisect around the others.
+        timed_positions = [position for position, timestamp in enumerate(timestamps) if not math.isnan(timestamp)]
+        if len(timed_positions) == len(timestamps):
+            self.timed_positions, self.timed_timestamps = None, timestamps
+        else:
+            self.timed_positions = array.array("Q", timed_positions)
+            self.timed_timestamps = array.array("d", (timestamps[position] for position in timed_positions))
+        known = self.timed_timestamps
+        # Only a log whose timestamps go back in time is scanned line by line.
+        self.sorted = all(known[i] <= known[i + 1] for i in range(len(known) - 1))
+
+    @classmethod
+    def build(cls, log_reader):
+        offsets, ends = array.array("Q"), array.array("Q")
+        timestamps, levels = array.array("d"), array.array("b")
+        for offset, line in log_reader.iter_lines():
+            if not line.strip():
+                continue
+            parsed = parse_log_line(line)
+            fields = parsed if isinstance(parsed, dict) else {}
+            timestamp = parse_timestamp(fields.get("timeStamp"))
+            level = fields.get("level")
+
+            offsets.append(offset)
+            ends.append(offset + len(line))
+            timestamps.append(math.nan if timestamp is None else timestamp)
+            levels.append(LOG_LEVELS.get(level.upper(), 0) if isinstance(level, str) else 0)
+        return cls(log_reader.log_path, offsets, ends, timestamps, levels)
+
+    @staticmethod
+    def index_path(digest, log_path):
+        path_hash = hashlib.sha256(normalize_member_name(log_path).encode()).hexdigest()[:16]
+        return artifact_path(f"{digest}.{path_hash}{LOG_INDEX_SUFFIX}")
+
+    def save(self, digest):
+        """Writes one JSON header line followed by the raw arrays."""
+        index_path = self.index_path(digest, self.log_path)
+        temp_path = f"{index_path}.{os.getpid()}.tmp"
+        header = json.dumps({
+            "version": LOG_INDEX_VERSION,
+            "sha256": digest,
+            "log_path": normalize_member_name(self.log_path),
+            "count": len(self.offsets)
+        }).encode() + b"\n"
+        try:
+            with open(temp_path, "wb") as file_object:
+                file_object.write(header)
+                for values in (self.offsets, self.ends, self.timestamps, self.levels):
+                    values.tofile(file_object)
+            os.replace(temp_path, index_path)
+        except OSError as e:
+            print(f"Error occurred in LogIndex > save : {e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    @classmethod
+    def load(cls, digest, log_path):
+        """Returns the saved index of the log, or None when it is missing or from another format."""
+        try:
+            with open(cls.index_path(digest, log_path), "rb") as file_object:
+                header = json.loads(file_object.readline())
+                if (header.get("version") != LOG_INDEX_VERSION or header.get("sha256") != digest
+                        or header.get("log_path") != normalize_member_name(log_path)):
+                    return None
+
+                columns = []
+                for typecode in ("Q", "Q", "d", "b"):
+                    values = array.array(typecode)
+                    values.fromfile(file_object, header["count"])
+                    columns.append(values)
+        except (OSError, ValueError, EOFError, KeyError):
+            return None
+        return cls(log_path, *columns)
+
+    def select(self, since=None, until=None, min_level=None):
+        """Returns the positions of the lines in [since, until] at `min_level` or above."""
+        positions = range(len(self.offsets))
+        if self.sorted and (since is not None or until is not None):
+            # A time range never matches a line without a timestamp.
+            start = bisect.bisect_left(self.timed_timestamps, since) if since is not None else 0
+            stop = bisect.bisect_right(self.timed_timestamps, until) if until is not None else len(self.timed_timestamps)
+            positions = range(start, stop) if self.timed_positions is None else self.timed_positions[start:stop]
+
+        matches = []
+        for position in positions:
+            timestamp = self.timestamps[position]
+            if since is not None and not timestamp >= since:
+                continue
+            if until is not None and not timestamp <= until:
+                continue
+            if min_level is not None and self.levels[position] < min_level:
+                continue
+            matches.append(position)
+        return matches
+
+    def read_lines(self, log_reader, positions):
+        """Reads the given lines, one range read per run of adjacent lines."""
+        lines = []
+        run_start = 0
+        while run_start < len(positions):
+            run_end = run_start
+            while run_end + 1 < len(positions) and positions[run_end + 1] == positions[run_end] + 1:
+                run_end += 1
+
+            first = self.offsets[positions[run_start]]
+            block = log_reader.read(first, self.ends[positions[run_end]] - first)
+            for position in positions[run_start:run_end + 1]:
+                line = block[self.offsets[position] - first:self.ends[position] - first]
+                lines.append(parse_log_line(line))
+            run_start = run_end + 1
+        return lines
+
+
+def load_log_index(digest, log_path):
+    """Returns the cached or saved index of a log, or None when it has not been built yet."""
+    key = (digest, normalize_member_name(log_path))
+    with log_indexes_lock:
+        if key in log_indexes:
+            log_indexes.move_to_end(key)
+            return log_indexes[key]
+
+    log_index = LogIndex.load(digest, log_path)
+    if log_index is not None:
+        cache_log_index(digest, log_index)
+    return log_index
+
+
+def cache_log_index(digest, log_index):
+    with log_indexes_lock:
+        log_indexes[(digest, normalize_member_name(log_index.log_path))] = log_index
+        while len(log_indexes) > LOG_INDEX_CACHE_SIZE:
+            log_indexes.popitem(last=False)
+
+
+def get_log_index(log_reader):
+    """Returns the index of a log, loading or building it once per bundle content."""
+    digest = bundle_digest(log_reader.ctrl.tgz_path)
+    log_index = load_log_index(digest, log_reader.log_path)
+    if log_index is None:
+        log_index = LogIndex.build(log_reader)
+        log_index.save(digest)
+        cache_log_index(digest, log_index)
+    return log_index
+
+
+def unindexed_logs(tgz_path, log_paths):
+    """The logs of `log_paths` that have no cached or saved index yet, in archive order."""
+    digest = bundle_digest(tgz_path)
+    with log_indexes_lock:
+        cached = {log_path for log_path in log_paths if (digest, normalize_member_name(log_path)) in log_indexes}
+    return [log_path for log_path in get_tar_controller(tgz_path).in_archive_order(log_paths)
+            if log_path not in cached and not os.path.exists(LogIndex.index_path(digest, log_path))]
+
+
+def build_log_indexes(tgz_path, log_paths, digest):
+    """Builds and saves the index of each log, one after the other in the given order. Runs in a worker process."""
+    ctrl = get_tar_controller(tgz_path)
+    for log_path in log_paths:
+        LogIndex.build(LogReader(ctrl, log_path)).save(digest)
+
+
+def count_levels_by_bucket(log_index, bucket_seconds=60):
+    """
+    Counts the lines of a log per (bucket start in epoch seconds, level) straight from its index columns.
+    Lines without a timestamp are counted under the bucket None.
+    """
+    buckets = [None if math.isnan(timestamp) else int(timestamp // bucket_seconds) * bucket_seconds
+               for timestamp in log_index.timestamps]
+    return Counter(zip(buckets, log_index.levels))
+
+
+def read_filtered_log(log_reader, since=None, until=None, min_level=None, cursor=0, limit=None):
+    """
+    Returns the lines of the log matching the filters, from the byte `cursor`, as a page.
+    `since`/`until` are ISO 8601 timestamps and `min_level` a level name such as ERROR.
+    """
+    since_timestamp = parse_timestamp(since) if since is not None else None
+    until_timestamp = parse_timestamp(until) if until is not None else None
+    assert since is None or since_timestamp is not None, f"since must be an ISO 8601 timestamp: '{since}'"
+    assert until is None or until_timestamp is not None, f"until must be an ISO 8601 timestamp: '{until}'"
+    assert min_level is None or min_level.upper() in LOG_LEVELS, f"min_level must be one of {list(LOG_LEVELS)}"
+    assert limit is None or limit > 0, "limit must be greater than 0"
+
+    log_index = get_log_index(log_reader)
+    matches = log_index.select(since_timestamp, until_timestamp, LOG_LEVELS[min_level.upper()] if min_level else None)
+
+    first = bisect.bisect_left(matches, bisect.bisect_left(log_index.offsets, cursor))
+    page = matches[first:first + limit] if limit else matches[first:]
+    remaining = len(matches) - first - len(page)
+
+    next_cursor = log_index.ends[page[-1]] + 1 if page else cursor
+    result = log_reader.page(log_index.read_lines(log_reader, page), cursor, min(next_cursor, log_reader.size))
+    result["eof"] = remaining == 0
+    result["matches"] = len(matches)
+    return result
@@ -0,0 +1,104 @@
+# log_reader.py
+
+import json
+
+LOG_READ_CHUNK = 256 * 1024
+
+
+def parse_log_line(line):
+    """Returns the JSON object of a structured log line, or the line as text."""
+    line = line.strip()
+    try:
+        return json.loads(line)
+    except ValueError:
+        return line.decode("utf-8", errors="replace")
+
+
+class LogReader:
+    """
+    Reads a container log member a chunk at a time, forwards from a byte cursor or backwards
+    from the end, so memory use depends on the page size and not on the size of the log.
+    Cursors are byte offsets of the start of a line in the log member.
+    """
+    def __init__(self, ctrl, log_path):
+        self.ctrl = ctrl
+        self.log_path = log_path
+        self.size = ctrl.get_file_size(log_path)
+        assert self.size is not None, f"'{log_path}' not found in {ctrl.tgz_path}"
+
+    def read(self, start, length):
+        return self.ctrl.read_file_range(self.log_path, start, length)
+
+    def iter_lines(self, cursor=0):
+        """Yields (offset, line) for every line from `cursor` to the end of the log."""
+        position = cursor
+        line_start = cursor
+        pending = b""
+        while position < self.size:
+            chunk = self.read(position, LOG_READ_CHUNK)
+            if not chunk:
+                break
+            position += len(chunk)
+
+            lines = (pending + chunk).split(b"\n")
+            pending = lines.pop()
+            for line in lines:
+                yield line_start, line
+                line_start += len(line) + 1
+
+        if pending:
+            yield line_start, pending
+
+    def read_page(self, cursor=0, limit=1000):
+        """Returns up to `limit` non-empty lines from `cursor`, and the cursor of the line after them."""
+        assert 0 <= cursor <= self.size, f"cursor must be between 0 and {self.size}"
+        assert limit > 0, "limit must be greater than 0"
+
+        lines = []
+        next_cursor = cursor
+        for offset, line in self.iter_lines(cursor):
+            if len(lines) == limit:
+                break
+            next_cursor = min(offset + len(line) + 1, self.size)
+            if line.strip():
+                lines.append(parse_log_line(line))
+
+        return self.page(lines, cursor, next_cursor)
+
+    def read_tail(self, n):
+        """Returns the last `n` non-empty lines, reading backwards from the end of the log."""
+        assert n > 0, "tail must be greater than 0"
+
+        tail = []  # (offset, line), last line first
+        position = self.size
+        pending = b""
+        while position > 0 and len(tail) < n:
+            start = max(0, position - LOG_READ_CHUNK)
+            pending = self.read(start, position - start) + pending
+            position = start
+
+            # Everything after the first newline is made of complete lines.
+            parts = pending.split(b"\n")
+            pending = parts[0]
+            offset = position + len(pending) + 1
+            complete = []
+            for part in parts[1:]:
+                complete.append((offset, part))
+                offset += len(part) + 1
+            tail.extend((offset, line) for offset, line in reversed(complete) if line.strip())
+
+        if position == 0 and len(tail) < n and pending.strip():
+            tail.append((0, pending))
+
+        tail = tail[:n][::-1]
+        cursor = tail[0][0] if tail else self.size
+        return self.page([parse_log_line(line) for _, line in tail], cursor, self.size)
+
+    def page(self, lines, cursor, next_cursor):
+        return {
+            "lines": lines,
+            "cursor": cursor,
+            "next_cursor": next_cursor,
+            "eof": next_cursor >= self.size,
+            "size": self.size
+        }
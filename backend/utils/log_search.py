@@ -0,0 +1,397 @@
+# log_search.py
+
+import os
+import re
+import mmap
+import json
+import array
+import heapq
+import bisect
+import itertools
+import struct
+import shutil
+import tempfile
+
+from operator import itemgetter
+
+from utils.conf import LOG_SEARCH_REGISTRY_SIZE, LOG_SEARCH_RUN_POSTINGS
+from utils.bundle_registry import BundleRegistry, artifact_path, bundle_digest
+from utils.snapshot import get_snapshot
+from utils.tar_controller import get_tar_controller
+from utils.log_reader import LogReader, parse_log_line
+
+LOG_SEARCH_VERSION = 3
+LOG_SEARCH_SUFFIX = ".logsearch"
+
+TOKEN_PATTERN = re.compile(rb"[a-z0-9_]+")
+QUERY_TERM_PATTERN = re.compile(r'"([^"]*)"|(\S+)')
+MAX_TOKEN_LENGTH = 64
+# Tokens on more than this share of the lines (JSON keys, "info", ...) get no postings list.
+STOP_TOKEN_SHARE = 0.5
+STOP_TOKEN_MIN_LINES = 1000
+
+RUN_ENTRY = struct.Struct("<HI")  # token length, number of line ids of one token in a run
+SPILL_ITEMS = 1024 * 64
+
+
+def tokenize(text):
+    """Lower-case ASCII words of a line or query; longer tokens than MAX_TOKEN_LENGTH (hashes, blobs) are not indexed."""
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if len(token) <= MAX_TOKEN_LENGTH]
+
+
+class QueryTerm:
+    """One word or quoted phrase of a query. A trailing * makes its last token a prefix."""
+    def __init__(self, text):
+        self.prefix = text.endswith("*")
+        self.tokens = tokenize(text.rstrip("*").encode())
+        assert self.tokens, f"'{text}' has nothing to search for"
+
+        # Several tokens must appear next to each other; that is checked on the line itself.
+        pattern = rb"[^a-z0-9_]+".join(re.escape(token) for token in self.tokens)
+        self.pattern = re.compile(rb"(?<![a-z0-9_])" + pattern + (rb"" if self.prefix else rb"(?![a-z0-9_])"))
+        self.needs_check = len(self.tokens) > 1
+
+
+class SpilledArray:
+    """Appends numbers to a file through a small buffer, so a column of any length takes no memory."""
+    def __init__(self, file_object, typecode):
+        self.file_object = file_object
+        self.buffer = array.array(typecode)
+        self.count = 0
+
+    def append(self, value):
+        self.buffer.append(value)
+        self.count += 1
+        if len(self.buffer) >= SPILL_ITEMS:
+            self.flush()
+
+    def write(self, data):
+        """Appends raw values of the same type."""
+        self.flush()
+        self.file_object.write(data)
+        self.count += len(data) // self.buffer.itemsize
+
+    def flush(self):
+        self.buffer.tofile(self.file_object)
+        del self.buffer[:]
+
+
+def write_run(run_path, run):
+    """Writes the postings gathered from a batch of lines, sorted by token."""
+    with open(run_path, "wb") as file_object:
+        for token in sorted(run):
+            line_ids = run[token]
+            file_object.write(RUN_ENTRY.pack(len(token), len(line_ids)))
+            file_object.write(token)
+            line_ids.tofile(file_object)
+
+
+def read_run(run_path):
+    """Yields (token, raw line ids) of a run, in token order."""
+    with open(run_path, "rb") as file_object:
+        while True:
+            entry = file_object.read(RUN_ENTRY.size)
+            if not entry:
+                return
+            token_length, count = RUN_ENTRY.unpack(entry)
+            yield file_object.read(token_length), file_object.read(count * 4)
+
+
+def build_search_index(tgz_path, log_paths, index_path, digest):
+    """
+    Writes the search index of the container logs `log_paths` to `index_path`. Runs in a worker process.
+
+    The logs are read in the given order, which should be the archive order. The postings of at most
+    LOG_SEARCH_RUN_POSTINGS (token, line) pairs are held at a time, then spilled to a run file sorted
+    by token, and the runs are merged token by token into the index, so memory does not grow with
+    the number of lines or of distinct tokens.
+    """
+    ctrl = get_tar_controller(tgz_path)
+    with tempfile.TemporaryDirectory(prefix="logsearch-", dir=os.path.dirname(index_path)) as work_dir:
+        def work_file(name):
+            return open(os.path.join(work_dir, name), "w+b")
+
+        log_starts = array.array("Q")
+        log_sizes = []
+        run_paths = []
+        run = {}
+        run_postings = 0
+        with work_file("offsets") as offsets_file, work_file("token_starts") as token_starts_file, \
+                work_file("postings_starts") as postings_starts_file, work_file("postings") as postings_file, \
+                work_file("tokens") as tokens_file:
+            offsets = SpilledArray(offsets_file, "Q")
+            for log_path in log_paths:
+                log_reader = LogReader(ctrl, log_path)
+                log_starts.append(offsets.count)
+                log_sizes.append(log_reader.size)
+
+                for offset, line in log_reader.iter_lines():
+                    line_id = offsets.count
+                    offsets.append(offset)
+                    tokens = set(tokenize(line))
+                    for token in tokens:
+                        line_ids = run.get(token)
+                        if line_ids is None:
+                            line_ids = run[token] = array.array("I")
+                        line_ids.append(line_id)
+                    run_postings += len(tokens)
+                    if run_postings >= LOG_SEARCH_RUN_POSTINGS:
+                        run_paths.append(os.path.join(work_dir, f"run{len(run_paths)}"))
+                        write_run(run_paths[-1], run)
+                        run, run_postings = {}, 0
+            if run:
+                run_paths.append(os.path.join(work_dir, f"run{len(run_paths)}"))
+                write_run(run_paths[-1], run)
+            run.clear()
+            offsets.flush()
+            lines = offsets.count
+
+            # Runs hold increasing line ids, and merge keeps the runs of one token in run order.
+            stop_count = STOP_TOKEN_SHARE * lines if lines >= STOP_TOKEN_MIN_LINES else None
+            token_starts = SpilledArray(token_starts_file, "Q")
+            postings_starts = SpilledArray(postings_starts_file, "Q")
+            postings = SpilledArray(postings_file, "I")
+            token_starts.append(0)
+            postings_starts.append(0)
+            stop_tokens = []
+            token_bytes = 0
+            entries = heapq.merge(*(read_run(run_path) for run_path in run_paths), key=itemgetter(0))
+            pending_token, pending_ids = None, []
+            # A last (None, ...) entry writes out the last token.
+            for token, line_ids in itertools.chain(entries, [(None, b"")]):
+                if token == pending_token:
+                    pending_ids.append(line_ids)
+                    continue
+                if pending_token is not None:
+                    count = sum(len(part) for part in pending_ids) // 4
+                    if stop_count is not None and count > stop_count:
+                        stop_tokens.append(pending_token.decode())
+                    else:
+                        tokens_file.write(pending_token)
+                        token_bytes += len(pending_token)
+                        token_starts.append(token_bytes)
+                        for part in pending_ids:
+                            postings.write(part)
+                        postings_starts.append(postings.count)
+                pending_token, pending_ids = token, [line_ids]
+            for column in (token_starts, postings_starts, postings):
+                column.flush()
+
+            header = json.dumps({
+                "version": LOG_SEARCH_VERSION,
+                "sha256": digest,
+                "log_paths": log_paths,
+                "log_sizes": log_sizes,
+                "lines": lines,
+                "tokens": token_starts.count - 1,
+                "postings": postings.count,
+                "token_bytes": token_bytes,
+                "stop_tokens": stop_tokens
+            }).encode()
+            # The arrays are mapped as they are; padding the header keeps them 8-byte aligned.
+            header += b" " * (-(len(header) + 1) % 8) + b"\n"
+
+            temp_path = f"{index_path}.{os.getpid()}.tmp"
+            try:
+                with open(temp_path, "wb") as file_object:
+                    file_object.write(header)
+                    log_starts.tofile(file_object)
+                    for work in (offsets_file, token_starts_file, postings_starts_file, postings_file, tokens_file):
+                        work.seek(0)
+                        shutil.copyfileobj(work, file_object)
+                os.replace(temp_path, index_path)
+            except OSError as e:
+                print(f"Error occurred in log_search > build_search_index : {e}")
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+
+
+class LogSearchIndex:
+    """
+    Inverted index over every container log of a bundle: token -> ids of the lines containing it.
+    A line id is its position in `offsets`, which holds the byte offset of every line of every log,
+    one log after the other from `log_starts`, so a hit is read back with one range read.
+
+    The columns are mapped from the saved file rather than read into memory: `token_starts` cuts the
+    sorted tokens out of `token_bytes`, and `postings_starts` cuts the line ids of each token out of `postings`.
+    """
+    def __init__(self, header, mapped):
+        self.log_paths = header["log_paths"]
+        self.log_sizes = header["log_sizes"]
+        self.stop_tokens = {token.encode() for token in header["stop_tokens"]}
+        self.token_count = header["tokens"]
+        self.mapped = mapped
+
+        view = memoryview(mapped)
+        position = mapped.find(b"\n") + 1
+        columns = []
+        for typecode, count in (("Q", len(self.log_paths)), ("Q", header["lines"]), ("Q", self.token_count + 1),
+                                ("Q", self.token_count + 1), ("I", header["postings"]), ("B", header["token_bytes"])):
+            size = count * array.array(typecode).itemsize
+            assert position + size <= len(view), "the search index is truncated"
+            columns.append(view[position:position + size].cast(typecode))
+            position += size
+        self.log_starts, self.offsets, self.token_starts, self.postings_starts, self.postings, self.token_bytes = columns
+
+    def token(self, position):
+        return bytes(self.token_bytes[self.token_starts[position]:self.token_starts[position + 1]])
+
+    def find_token(self, token):
+        """Position of the first token that is not smaller than `token`."""
+        low, high = 0, self.token_count
+        while low < high:
+            middle = (low + high) // 2
+            if self.token(middle) < token:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def token_postings(self, position):
+        return self.postings[self.postings_starts[position]:self.postings_starts[position + 1]]
+
+    def locate(self, line_id):
+        """Returns (log number, byte offset, byte end) of a line."""
+        log_number = bisect.bisect_right(self.log_starts, line_id) - 1
+        last_line = self.log_starts[log_number + 1] - 1 if log_number + 1 < len(self.log_starts) else len(self.offsets) - 1
+        end = self.offsets[line_id + 1] - 1 if line_id < last_line else self.log_sizes[log_number]
+        return log_number, self.offsets[line_id], end
+
+    def read_line(self, ctrl, line_id):
+        log_number, offset, end = self.locate(line_id)
+        return ctrl.read_file_range(self.log_paths[log_number], offset, end - offset)
+
+    def token_lines(self, token, prefix=False):
+        """Line ids containing `token` (or a token starting with it), or None for a stop token."""
+        if not prefix:
+            if token in self.stop_tokens:
+                return None
+            position = self.find_token(token)
+            if position < self.token_count and self.token(position) == token:
+                return set(self.token_postings(position))
+            return set()
+
+        if any(stop_token.startswith(token) for stop_token in self.stop_tokens):
+            # It can match almost any line: handled like a stop token.
+            return None
+        line_ids = set()
+        position = self.find_token(token)
+        while position < self.token_count and self.token(position).startswith(token):
+            line_ids.update(self.token_postings(position))
+            position += 1
+        return line_ids
+
+    def search(self, ctrl, query, stop_after=None):
+        """
+        Returns the sorted ids of the lines matching every term of the query, and whether that is all of them.
+        Lines that have to be read for a phrase or a stop word are only read until `stop_after` of them match.
+        """
+        terms = [QueryTerm(quoted or word) for quoted, word in QUERY_TERM_PATTERN.findall(query)]
+        assert terms, "query must not be empty"
+
+        candidates = None
+        unchecked_terms = []
+        for term in terms:
+            term_lines = None
+            for position, token in enumerate(term.tokens):
+                token_lines = self.token_lines(token, term.prefix and position == len(term.tokens) - 1)
+                if token_lines is None:
+                    continue
+                term_lines = token_lines if term_lines is None else term_lines & token_lines
+            if term_lines is None:
+                # Only stop tokens: the lines of the other terms are checked for this one.
+                unchecked_terms.append(term)
+                continue
+            if term.needs_check:
+                unchecked_terms.append(term)
+            candidates = term_lines if candidates is None else candidates & term_lines
+
+        assert candidates is not None, f"'{query}' only has words that are on most log lines; add a more specific word"
+
+        line_ids = sorted(candidates)
+        if not unchecked_terms:
+            return line_ids, True
+
+        matches = []
+        for line_id in line_ids:
+            if stop_after is not None and len(matches) == stop_after:
+                return matches, False
+            line = self.read_line(ctrl, line_id).lower()
+            if all(term.pattern.search(line) for term in unchecked_terms):
+                matches.append(line_id)
+        return matches, True
+
+    def get_hits(self, ctrl, line_ids):
+        hits = []
+        for line_id in line_ids:
+            log_number, offset, _ = self.locate(line_id)
+            log_path = self.log_paths[log_number]
+            pod, _, container = os.path.basename(log_path).rpartition(".")[0].rpartition("_")
+            hits.append({
+                "pod": pod,
+                "container": container,
+                "log_path": log_path,
+                "line_number": line_id - self.log_starts[log_number] + 1,
+                "cursor": offset,
+                "line": parse_log_line(self.read_line(ctrl, line_id))
+            })
+        return hits
+
+
+def search_index_path(tgz_path):
+    return artifact_path(f"{bundle_digest(tgz_path)}{LOG_SEARCH_SUFFIX}")
+
+
+def search_log_paths(tgz_path, log_members):
+    """The container logs of the bundle, in archive order."""
+    return get_tar_controller(tgz_path).in_archive_order(log_members)
+
+
+def load_search_index(tgz_path):
+    """Maps the saved index of the bundle, or returns None when it is missing or from another format."""
+    try:
+        with open(search_index_path(tgz_path), "rb") as file_object:
+            header = json.loads(file_object.readline())
+            if header.get("version") != LOG_SEARCH_VERSION or header.get("sha256") != bundle_digest(tgz_path):
+                return None
+            mapped = mmap.mmap(file_object.fileno(), 0, access=mmap.ACCESS_READ)
+        return LogSearchIndex(header, mapped)
+    except (OSError, ValueError, KeyError, AssertionError) as e:
+        if not isinstance(e, FileNotFoundError):
+            print(f"Error occurred in log_search > load_search_index : {e}")
+        return None
+
+
+def load_or_build_search_index(tgz_path):
+    """Builds in this process; requests go through executor.ensure_search_index, which builds in the process pool."""
+    search_index = load_search_index(tgz_path)
+    if search_index is None:
+        log_paths = search_log_paths(tgz_path, get_snapshot(tgz_path).log_members)
+        build_search_index(tgz_path, log_paths, search_index_path(tgz_path), bundle_digest(tgz_path))
+        search_index = load_search_index(tgz_path)
+    return search_index
+
+
+search_registry = BundleRegistry(load_or_build_search_index, LOG_SEARCH_REGISTRY_SIZE, key_func=bundle_digest)
+
+
+def search_logs(tgz_path, search_index, query, offset=0, limit=100):
+    """
+    Returns a page of the log lines matching `query`. `total` is None when the query has a phrase
+    or a common word and only the lines up to the end of the page were checked.
+    """
+    assert offset >= 0, "offset must not be negative"
+    assert limit > 0, "limit must be greater than 0"
+
+    # The index is shared by the bundles of the same content; lines are read from this one.
+    ctrl = get_tar_controller(tgz_path)
+    # One match past the page tells whether there is a next one.
+    line_ids, complete = search_index.search(ctrl, query, offset + limit + 1)
+    page = line_ids[offset:offset + limit]
+    return {
+        "query": query,
+        "total": len(line_ids) if complete else None,
+        "offset": offset,
+        "next_offset": offset + len(page) if offset + len(page) < len(line_ids) else None,
+        "hits": search_index.get_hits(ctrl, page)
+    }
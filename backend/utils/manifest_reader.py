@@ -0,0 +1,214 @@
+# manifest_reader.py
+
+import io
+import re
+import json
+import yaml
+import codecs
+import itertools
+
+from utils.conf import MANIFEST_READ_SIZE
+
+# The libyaml loader is an order of magnitude faster than the pure Python one when PyYAML was built with it.
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+JSON_WHITESPACE = re.compile(r"[ \t\n\r]*")
+NUMBER_CHARACTERS = frozenset("0123456789.eE+-")
+YAML_ITEMS_KEY = re.compile(r"items:[ \t]*(?:#.*)?")
+YAML_DOCUMENT_MARKER = re.compile(r"(?:---|\.\.\.)[ \t]*(?:#.*)?")
+
+# Fields of a node item the API serves; None keeps the whole value.
+NODE_FIELDS = {
+    "metadata": {"name": None, "labels": None},
+    "status": {"addresses": None, "allocatable": None, "capacity": None, "nodeInfo": {"osImage": None}}
+}
+
+
+def project(item, fields):
+    """Keeps only `fields` of a manifest item, e.g. drops the annotations and managedFields of a node."""
+    if not isinstance(item, dict):
+        return item
+    return {key: item[key] if sub_fields is None else project(item[key], sub_fields)
+            for key, sub_fields in fields.items() if key in item}
+
+
+class JSONReader:
+    """
+    Decodes the JSON values of a binary file one after the other, reading and decoding it
+    MANIFEST_READ_SIZE bytes at a time, so the text held is one value plus one chunk.
+    """
+    def __init__(self, file_object):
+        self.file_object = file_object
+        self.text_decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self.decoder = json.JSONDecoder()
+        self.text = ""
+        self.position = 0
+        self.eof = False
+
+    def fill(self):
+        """Adds the next chunk to the text, dropping what was already decoded. False at the end of the file."""
+        if self.eof:
+            return False
+        chunk = self.file_object.read(MANIFEST_READ_SIZE)
+        self.eof = not chunk
+        self.text = self.text[self.position:] + self.text_decoder.decode(chunk, final=self.eof)
+        self.position = 0
+        return True
+
+    def peek(self):
+        """Skips whitespace and returns the next character, or "" at the end of the file."""
+        while True:
+            self.position = JSON_WHITESPACE.match(self.text, self.position).end()
+            if self.position < len(self.text) or not self.fill():
+                return self.text[self.position:self.position + 1]
+
+    def expect(self, character):
+        if self.peek() != character:
+            raise ValueError(f"Expecting '{character}' delimiter")
+        self.position += 1
+
+    def value(self):
+        """Decodes the next value, reading more of the file while it is cut by the end of the text."""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.text, self.position)
+                # A number cut by the end of the text, e.g. "1." of "1.5e3", may go on in the next chunk.
+                if self.eof or (end < len(self.text) and self.text[end] not in NUMBER_CHARACTERS):
+                    self.position = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self.fill()
+
+
+def iter_json_items(file_object):
+    """
+    Yields the entries of the top level "items" list of a JSON manifest, or of a top level list,
+    one at a time, decoding the other top level values on the way, so only one item is held as
+    Python objects at once.
+    """
+    reader = JSONReader(file_object)
+    if reader.peek() == "[":
+        yield from iter_json_list(reader)
+        return
+    if reader.peek() != "{":
+        return
+    reader.position += 1
+    while reader.peek() != "}":
+        key = reader.value()
+        reader.expect(":")
+
+        if key == "items" and reader.peek() == "[":
+            yield from iter_json_list(reader)
+        else:
+            reader.value()
+
+        if reader.peek() == ",":
+            reader.position += 1
+
+
+def iter_json_list(reader):
+    """Yields the entries of the list the reader is at, and moves past it."""
+    reader.position += 1
+    while reader.peek() != "]":
+        yield reader.value()
+        if reader.peek() == ",":
+            reader.position += 1
+    reader.position += 1
+
+
+def document_items(document):
+    """The items of one loaded YAML document: those of a List, the entries of a plain list, or a single object."""
+    if isinstance(document, list):
+        return document
+    if not isinstance(document, dict):
+        return []
+    if "items" in document:
+        return document["items"] if isinstance(document["items"], list) else []
+    return [document] if "kind" in document else []
+
+
+def is_blank(line):
+    return not line.strip() or line.lstrip().startswith("#")
+
+
+def iter_yaml_items(file_object):
+    """
+    Yields the items of a YAML manifest one at a time: the entries of the "items" list of each
+    document, or the documents themselves when they are plain lists or single objects.
+    """
+    text_file = io.TextIOWrapper(file_object, encoding="utf-8", errors="replace", newline="")
+    lines = (line[:-1] if line.endswith("\n") else line for line in text_file)
+    more = True
+    while more:
+        more = yield from iter_yaml_document_items(lines)
+
+
+def iter_yaml_document_items(lines):
+    """
+    Yields the items of the next document of `lines` and returns whether another document follows.
+    kubectl writes every entry of "items" as a "- " line at the indentation of the list followed by
+    more indented lines, so each entry is read line by line and loaded on its own. Any other layout
+    is loaded as a whole document.
+    """
+    head = []  # the lines up to the first entry of "items"
+    items_key = False
+    for line in lines:
+        if YAML_DOCUMENT_MARKER.fullmatch(line):
+            if all(is_blank(head_line) for head_line in head):
+                continue
+            yield from document_items(yaml.load("\n".join(head), Loader=YAML_LOADER))
+            return True
+        head.append(line)
+        if YAML_ITEMS_KEY.fullmatch(line):
+            items_key = True
+        elif items_key and not is_blank(line):
+            break
+    else:
+        if not all(is_blank(head_line) for head_line in head):
+            yield from document_items(yaml.load("\n".join(head), Loader=YAML_LOADER))
+        return False
+
+    first_entry = head[-1]
+    if not first_entry.lstrip().startswith("- "):
+        more = False
+        for line in lines:
+            if YAML_DOCUMENT_MARKER.fullmatch(line):
+                more = True
+                break
+            head.append(line)
+        yield from document_items(yaml.load("\n".join(head), Loader=YAML_LOADER))
+        return more
+
+    # The blank and comment lines between the "items" key and its first entry
+    skipped_lines = head[next(i for i, line in enumerate(head) if YAML_ITEMS_KEY.fullmatch(line)) + 1:-1]
+    entry_prefix = first_entry[:len(first_entry) - len(first_entry.lstrip())] + "- "
+    entry_lines = None
+    more = False
+    for line in itertools.chain(skipped_lines, [first_entry], lines):
+        if line.startswith(entry_prefix) or line == entry_prefix.rstrip():
+            if entry_lines:
+                yield yaml.load("\n".join(entry_lines), Loader=YAML_LOADER)[0]
+            entry_lines = [line]
+        elif is_blank(line) or line.startswith(entry_prefix[:-2] + " "):
+            if entry_lines:
+                entry_lines.append(line)
+        else:
+            # Back at the indentation of the "items" key: the next top level key, or the next document.
+            more = YAML_DOCUMENT_MARKER.fullmatch(line) is not None
+            break
+    if entry_lines:
+        yield yaml.load("\n".join(entry_lines), Loader=YAML_LOADER)[0]
+    if not more:
+        # The other top level keys of the document are not items.
+        more = any(YAML_DOCUMENT_MARKER.fullmatch(line) for line in lines)
+    return more
+
+
+def iter_manifest_items(path, file_object):
+    """Yields the items of a JSON or YAML list manifest read from a binary file, one at a time."""
+    if path.endswith(".json"):
+        return iter_json_items(file_object)
+    return iter_yaml_items(file_object)
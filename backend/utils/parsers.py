@@ -0,0 +1,246 @@
+# parsers.py
+
+import re
+import operator
+
+ENV_INFO_PARSERS = {
+    "Namespace:": "namespace",
+    "USER_NS:": "namespace",
+    "Version:": "version",
+    "Order:": "order",
+    "Site Number:": "site_number",
+    "License Expires:": "license_expires",
+    "CAS Mode:": "cas_mode",
+    "CAS Disk Cache:": "cas_disk_cache",
+    "SAS Work": "sas_work",
+    "PostgreSQL Database:": "postgresql_db",
+    "TLS Mode:": "tls_mode",
+    "Certificate Generator:": "cert_generator",
+    "Ingress Host:": "ingress_host",
+    "Ingress Certificate:": "ingress_cert"
+}
+
+# Labels of a kubectl get header are separated by at least two spaces; "NOMINATED NODE" is one label.
+GET_HEADER_LABEL_PATTERN = re.compile(r"\S+(?: \S+)*")
+
+QUANTITY_PATTERN = re.compile(r"([+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)(Ki|Mi|Gi|Ti|Pi|Ei|n|u|m|k|M|G|T|P|E)?")
+QUANTITY_MULTIPLIERS = {
+    "": 1,
+    "n": 1e-9,
+    "u": 1e-6,
+    "m": 1e-3,
+    "k": 1000,
+    "M": 1000 ** 2,
+    "G": 1000 ** 3,
+    "T": 1000 ** 4,
+    "P": 1000 ** 5,
+    "E": 1000 ** 6,
+    "Ki": 1024,
+    "Mi": 1024 ** 2,
+    "Gi": 1024 ** 3,
+    "Ti": 1024 ** 4,
+    "Pi": 1024 ** 5,
+    "Ei": 1024 ** 6
+}
+
+
+def parse_env_info(content):
+    """Parses the get-k8s-info.log summary into a dict. The first match of each key wins."""
+    env_info_dict = {}
+    for line in content.splitlines():
+        for prefix, key in ENV_INFO_PARSERS.items():
+            if line.startswith(prefix) and key not in env_info_dict.keys():
+                env_info_dict[key] = line[line.find(":") + 1:].strip()
+                break
+
+    return env_info_dict
+
+
+def parse_get_table(get_text):
+    """
+    Parses a kubectl get table into (names, {name: {column: value}}) in one pass.
+    The column offsets are read once from the "NAME ..." header and every row is sliced at them,
+    so empty cells and values with double spaces stay in their column. A row that does not line
+    up with the header (a cell running into the next column) is split on double spaces instead.
+    """
+    names = []
+    get_output = {}
+    columns = []
+    for line in get_text.split('\n'):
+        if line.startswith("NAME"):
+            labels = list(GET_HEADER_LABEL_PATTERN.finditer(line))
+            columns = [label.group() for label in labels[1:]]
+            if columns:
+                starts = [label.start() for label in labels]
+                cut_cells = operator.itemgetter(*[slice(start, end) for start, end in zip(starts, starts[1:] + [None])])
+                # The character before each column; all blank when the row lines up with the header.
+                cut_gaps = operator.itemgetter(*[slice(start - 1, start) for start in starts[1:]])
+            continue
+        if not columns or not line.strip():
+            continue
+
+        line_split = None
+        if not "".join(cut_gaps(line)).strip():
+            line_split = [cell.strip() for cell in cut_cells(line)]
+        # Object names never hold spaces, so a first cell with one did not line up either.
+        if not line_split or not line_split[0] or " " in line_split[0]:
+            line_split = [i.strip() for i in line.split("  ") if i.strip()]
+        name = line_split[0]
+        names.append(name)
+        get_output[name] = dict(zip(columns, line_split[1:]))
+
+    return names, get_output
+
+
+def parse_get_output(get_text):
+    return parse_get_table(get_text)[1]
+
+
+def get_names_from_get_output(get_text):
+    return parse_get_table(get_text)[0]
+
+
+class DescribeOutput:
+    """
+    A kubectl describe output indexed in one pass over a single copy of its text. Every object
+    is kept as the (start, end) offsets of its lines and of the runs of lines of each top level
+    section, and its text is only cut out of the shared text when it is asked for.
+
+    An object starts at a "Name:" line that is followed by another line. Lines before the first
+    one form an object of their own, which starts with an empty line.
+    """
+    def __init__(self, describe_text):
+        self.text = describe_text
+        self.objects = []  # (start, end, starts with an empty line, {section: [[start, end], ...]})
+
+        name_line = None
+        current_object = None  # [start, end, starts with an empty line, sections, current section]
+        line_start = 0
+        while line_start <= len(describe_text):
+            line_end = describe_text.find("\n", line_start)
+            if line_end == -1:
+                line_end = len(describe_text)
+
+            if describe_text.startswith("Name:", line_start):
+                name_line = (line_start, line_end)
+                if current_object is not None:
+                    self.objects.append(tuple(current_object[:4]))
+                    current_object = None
+            else:
+                if name_line is not None:
+                    current_object = [name_line[0], name_line[1], False, {}, ""]
+                    self.add_line(current_object, *name_line)
+                    name_line = None
+                elif current_object is None:
+                    current_object = [line_start, line_start, True, {}, ""]
+                    self.add_line(current_object, line_start, line_start)
+                self.add_line(current_object, line_start, line_end)
+            line_start = line_end + 1
+
+        if current_object is not None:
+            self.objects.append(tuple(current_object[:4]))
+
+        self.positions = {}  # object name -> position, from its "Name:" line
+        for position, (start, end, empty_first_line, _) in enumerate(self.objects):
+            if not empty_first_line:
+                name_end = describe_text.find("\n", start, end)
+                name = describe_text[start + len("Name:"):end if name_end == -1 else name_end].strip()
+                self.positions.setdefault(name, position)
+
+    def add_line(self, current_object, line_start, line_end):
+        """Adds a line to the section it belongs to, extending the last run when it directly follows it."""
+        if line_end > line_start and self.text[line_start] != " ":
+            colon = self.text.find(":", line_start, line_end)
+            current_object[4] = self.text[line_start:line_end if colon == -1 else colon]
+
+        runs = current_object[3].setdefault(current_object[4], [])
+        if runs and runs[-1][1] + 1 == line_start:
+            runs[-1][1] = line_end
+        else:
+            runs.append([line_start, line_end])
+        current_object[1] = line_end
+
+    def __len__(self):
+        return len(self.objects)
+
+    def __getitem__(self, index):
+        """Returns {section: text} of one object."""
+        sections = self.objects[index][3]
+        return {section: "\n".join(self.text[start:end] for start, end in runs) for section, runs in sections.items()}
+
+    def __iter__(self):
+        return (self[index] for index in range(len(self.objects)))
+
+    def find(self, name):
+        """Returns {section: text} of the object with this name, or None."""
+        position = self.positions.get(name)
+        return None if position is None else self[position]
+
+    def get_text(self, index):
+        """Returns the whole text of one object."""
+        start, end, empty_first_line, _ = self.objects[index]
+        return ("\n" if empty_first_line else "") + self.text[start:end]
+
+
+def parse_describe_output(describe_text):
+    describe_output = DescribeOutput(describe_text)
+    return [describe_output.get_text(index) for index in range(len(describe_output))]
+
+
+def parse_describe_sections(describe_text):
+    """Splits every object of a describe output into its top level sections."""
+    return list(DescribeOutput(describe_text))
+
+
+def parse_quantity(quantity):
+    """
+    Returns a Kubernetes quantity such as "3350m", "12Gi", "32817324Ki" or "1e3" as a number
+    (cores for cpu, bytes for memory), or None when it is not a quantity.
+    """
+    match = QUANTITY_PATTERN.fullmatch(quantity.strip()) if isinstance(quantity, str) else None
+    if match is None:
+        return None
+    number, suffix = match.groups()
+    value = float(number) * QUANTITY_MULTIPLIERS[suffix or ""]
+    return int(value) if value.is_integer() else value
+
+
+def parse_node_resources(describe_nodes_text):
+    """
+    Reads the allocated resources of every node from describe/nodes.txt in one pass over its lines.
+    Each node gets its own record as soon as its "Name:" line is seen, so a node without an
+    "Allocated resources" block only lacks those fields instead of shifting the other nodes.
+    Requests and limits are kept as printed and also as numbers (cores and bytes).
+    """
+    non_terminated_pods_dict = {}
+    node = None
+    in_allocated_resources = False
+
+    for line in describe_nodes_text.split('\n'):
+        if line.startswith("Name:"):
+            name_split = line.split()
+            node = non_terminated_pods_dict.setdefault(name_split[1], {}) if len(name_split) > 1 else None
+            in_allocated_resources = False
+        elif node is None:
+            continue
+        elif line.startswith("Non-terminated Pods:"):
+            node["non_terminated_pods"] = line.split()[2].replace("(", "")
+        elif line.startswith("Allocated resources:"):
+            in_allocated_resources = True
+        elif line and not line.startswith(" "):
+            in_allocated_resources = False
+        elif in_allocated_resources and (line.startswith("  cpu ") or line.startswith("  memory ")):
+            # "  cpu    3350m (42%)   12 (151%)"
+            line_split = line.split()
+            if len(line_split) < 5:
+                continue
+            resource, requests, requests_pct, limits, limits_pct = line_split[:5]
+            node[f"{resource}_requests"] = requests
+            node[f"{resource}_requests_pct"] = requests_pct.replace("(", "").replace(")", "")
+            node[f"{resource}_limits"] = limits
+            node[f"{resource}_limits_pct"] = limits_pct.replace("(", "").replace(")", "")
+            unit = "cores" if resource == "cpu" else "bytes"
+            node[f"{resource}_requests_{unit}"] = parse_quantity(requests)
+            node[f"{resource}_limits_{unit}"] = parse_quantity(limits)
+
+    return non_terminated_pods_dict
@@ -0,0 +1,89 @@
+# pod_model.py
+
+from utils.dict_utils import deep_get
+from utils.parsers import parse_quantity
+
+
+def as_dict(value):
+    return value if isinstance(value, dict) else {}
+
+
+def as_list(value):
+    return value if isinstance(value, list) else []
+
+
+def container_names(statuses):
+    """Names of the containers of a pod status list; entries without a name are left out."""
+    return tuple(status["name"] for status in statuses if isinstance(status, dict) and isinstance(status.get("name"), str))
+
+
+def pod_resources(pod_spec, kind):
+    """
+    Effective cpu and memory `kind` ("requests" or "limits") of a pod as the scheduler counts them:
+    the sum over its containers, or its largest init container when that is higher.
+    """
+    totals = []
+    for resource in ("cpu", "memory"):
+        containers = sum(parse_quantity(deep_get(container, ["resources", kind, resource])) or 0
+                         for container in as_list(pod_spec.get("containers")))
+        init_containers = max((parse_quantity(deep_get(container, ["resources", kind, resource])) or 0
+                               for container in as_list(pod_spec.get("initContainers"))), default=0)
+        totals.append(max(containers, init_containers))
+    return totals
+
+
+class PodRecord:
+    """
+    The fields of one pod the API serves, read once from pods.json (or pods.yaml) at ingestion
+    so the full manifest does not have to be kept. cpu is in cores and memory in bytes.
+    """
+    __slots__ = (
+        "name", "node", "phase", "workload_class", "owner", "claims", "containers", "init_containers", "restarts",
+        "cpu_requests", "memory_requests", "cpu_limits", "memory_limits"
+    )
+
+    def __init__(self, item):
+        metadata = as_dict(item.get("metadata"))
+        spec = as_dict(item.get("spec"))
+        status = as_dict(item.get("status"))
+
+        # Both end up as dict keys, so anything but a string is taken as missing.
+        self.name = metadata.get("name") if isinstance(metadata.get("name"), str) else None
+        self.node = spec.get("nodeName") if isinstance(spec.get("nodeName"), str) else None
+        self.phase = status.get("phase")
+        self.workload_class = deep_get(metadata, ["labels", "workload.sas.com/class"], "undefined")
+
+        # (kind, name) of the controller, e.g. ("ReplicaSet", "sas-logon-app-7d8c6b5f9"), and the PVCs the pod mounts.
+        owners = [owner for owner in as_list(metadata.get("ownerReferences")) if isinstance(owner, dict)]
+        owner = next((owner for owner in owners if owner.get("controller")), owners[0] if owners else None)
+        self.owner = (owner.get("kind"), owner.get("name")) if owner else None
+        self.claims = tuple(dict.fromkeys(
+            volume["persistentVolumeClaim"]["claimName"] for volume in as_list(spec.get("volumes"))
+            if deep_get(volume, ["persistentVolumeClaim", "claimName"])
+        ))
+
+        # Names come from the statuses, like kubectl get pods shows them.
+        container_statuses = as_list(status.get("containerStatuses"))
+        self.init_containers = container_names(as_list(status.get("initContainerStatuses")))
+        self.containers = container_names(container_statuses)
+        self.restarts = sum(deep_get(container, ["restartCount"]) or 0 for container in container_statuses)
+
+        self.cpu_requests, self.memory_requests = pod_resources(spec, "requests")
+        self.cpu_limits, self.memory_limits = pod_resources(spec, "limits")
+
+
+def build_pod_records(items):
+    """
+    Returns one PodRecord per item of a pods manifest, in manifest order. An item that is not a pod
+    object, or whose fields have the wrong types, is left out instead of failing the whole manifest.
+    """
+    records = []
+    for item in items:
+        if not isinstance(item, dict):
+            print(f"Error occurred in pod_model > build_pod_records : skipped an item that is not an object: {item!r:.80}")
+            continue
+        try:
+            records.append(PodRecord(item))
+        except (TypeError, ValueError, KeyError, AttributeError) as e:
+            print(f"Error occurred in pod_model > build_pod_records : skipped pod '{deep_get(item, ['metadata', 'name'])}': {e}")
+    return records
@@ -0,0 +1,97 @@
+# relationship_graph.py
+
+# Kinds are the resource names of the get/describe outputs, e.g. "pods" or "persistentvolumeclaims".
+PODS = "pods"
+NODES = "nodes"
+PVCS = "persistentvolumeclaims"
+PVS = "persistentvolumes"
+
+
+def owner_resource_name(kind):
+    """ReplicaSet -> replicasets, like the describe output of the owner is named."""
+    return f"{kind.lower()}s"
+
+
+class RelationshipGraph:
+    """
+    Links between the objects of one namespace: pod <-> node, pod <-> PVC, PVC <-> PV and
+    pod <-> owner, up the "Controlled By" chain (ReplicaSet -> Deployment). Both ends of every
+    link are indexed, so the neighbours of an object are read without scanning the others.
+    """
+    def __init__(self):
+        self.adjacency = {}  # (kind, name) -> {kind: {name: None}}, in the order the links were found
+
+    def add_object(self, kind, name):
+        return self.adjacency.setdefault((kind, name), {})
+
+    def add_link(self, kind, name, other_kind, other_name):
+        if not name or not other_name:
+            return
+        self.add_object(kind, name).setdefault(other_kind, {})[other_name] = None
+        self.add_object(other_kind, other_name).setdefault(kind, {})[name] = None
+
+    def neighbors(self, kind, name):
+        """Returns {kind: [names]} of the objects linked to one object, or None when it is not in the graph."""
+        links = self.adjacency.get((kind, name))
+        if links is None:
+            return None
+        return {neighbor_kind: list(names) for neighbor_kind, names in links.items()}
+
+    def linked(self, kind, name, other_kind):
+        """Returns the names of the `other_kind` objects linked to one object."""
+        return list(self.adjacency.get((kind, name), {}).get(other_kind, ()))
+
+
+def add_owner_chain(graph, describes, namespace, kind, name):
+    """Follows "Controlled By: Deployment/name" of the describe output of each owner, e.g. ReplicaSet -> Deployment."""
+    seen = set()
+    while (kind, name) not in seen:
+        seen.add((kind, name))
+        describe = describes.get(f"kubernetes/{namespace}/describe/{kind}.txt")
+        describe_object = describe.find(name) if describe is not None else None
+        controlled_by = (describe_object or {}).get("Controlled By")
+        if not controlled_by:
+            return
+        owner_kind, _, owner_name = controlled_by.partition(":")[2].strip().partition("/")
+        if not owner_name:
+            return
+        graph.add_link(kind, name, owner_resource_name(owner_kind), owner_name)
+        kind, name = owner_resource_name(owner_kind), owner_name
+
+
+def build_relationship_graphs(snapshot):
+    """
+    Builds the graph of every namespace of a snapshot once its members are parsed: from the pod
+    records, the VOLUME column of the PVC get output and the describe outputs of the owners.
+    """
+    graphs = {}
+    for path in sorted(snapshot.pods):
+        namespace = path.split("/")[1]
+        if namespace in graphs:
+            continue
+        graph = graphs[namespace] = RelationshipGraph()
+        # JSON is preferred over YAML, like the pod endpoints read them.
+        pods = snapshot.pods.get(f"kubernetes/{namespace}/json/pods.json") or snapshot.pods[path]
+        owners = {}
+        for pod in pods:
+            graph.add_object(PODS, pod.name)
+            graph.add_link(PODS, pod.name, NODES, pod.node)
+            for claim in pod.claims:
+                graph.add_link(PODS, pod.name, PVCS, claim)
+            if pod.owner:
+                owner_kind, owner_name = pod.owner
+                graph.add_link(PODS, pod.name, owner_resource_name(owner_kind), owner_name)
+                owners[(owner_resource_name(owner_kind), owner_name)] = None
+        for owner_kind, owner_name in owners:
+            add_owner_chain(graph, snapshot.describes, namespace, owner_kind, owner_name)
+
+    for path, (names, rows) in snapshot.get_outputs.items():
+        if path.endswith(f"/get/{PVCS}.txt"):
+            graph = graphs.setdefault(path.split("/")[1], RelationshipGraph())
+            for pvc in names:
+                graph.add_object(PVCS, pvc)
+                volume = rows[pvc].get("VOLUME")
+                if volume and volume != "<none>":
+                    graph.add_link(PVCS, pvc, PVS, volume)
+
+    return graphs
@@ -0,0 +1,28 @@
+# responses.py
+
+import orjson
+
+from fastapi.responses import JSONResponse
+from fastapi.encoders import jsonable_encoder
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def dumps(content):
+    """orjson for the native types; anything else (sets, pydantic models, ...) goes through jsonable_encoder."""
+    return orjson.dumps(content, default=jsonable_encoder, option=ORJSON_OPTIONS)
+
+
+class ORJSONBytesResponse(JSONResponse):
+    """JSON response rendered with orjson. Bytes are taken as already encoded JSON and sent as is."""
+
+    def render(self, content):
+        if isinstance(content, (bytes, bytearray, memoryview)):
+            return bytes(content)
+        return dumps(content)
+
+
+def json_response(method, *args):
+    """Calls a resource method and encodes its result, in one executor call."""
+    return ORJSONBytesResponse(dumps(method(*args)))
+
@@ -0,0 +1,329 @@
+# snapshot.py
+
+import os
+import re
+import json
+import yaml
+import pickle
+import shutil
+import hashlib
+import tarfile
+import tempfile
+import threading
+
+from contextlib import contextmanager
+
+from utils.conf import SNAPSHOT_REGISTRY_SIZE, MANIFEST_READ_SIZE
+from utils.bundle_registry import BundleRegistry, artifact_dir, artifact_path, bundle_digest, is_own_artifact
+from utils.tar_index import GzipSeeker, is_gzip
+from utils.tar_controller import normalize_member_name
+from utils.parsers import parse_env_info, parse_get_table, parse_node_resources, DescribeOutput
+from utils.pod_model import build_pod_records
+from utils.manifest_reader import NODE_FIELDS, iter_manifest_items, project
+from utils.relationship_graph import RelationshipGraph, build_relationship_graphs
+
+ENV_INFO_PATH = ".get-k8s-info/get-k8s-info.log"
+NODES_DESCRIBE_PATH = "kubernetes/clusterwide/describe/nodes.txt"
+
+GET_OUTPUT_PATTERN = re.compile(r"^kubernetes/[^/]+/get/[^/]+\.txt$")
+DESCRIBE_OUTPUT_PATTERN = re.compile(r"^kubernetes/[^/]+/describe/[^/]+\.txt$")
+POD_MANIFEST_PATTERN = re.compile(r"^kubernetes/[^/]+/(json/pods\.json|yaml/pods\.yaml)$")
+JSON_MANIFEST_PATTERN = re.compile(r"^kubernetes/[^/]+/json/(nodes|pods)\.json$")
+YAML_MANIFEST_PATTERN = re.compile(r"^kubernetes/[^/]+/yaml/(nodes|pods)\.yaml$")
+LOG_PATTERN = re.compile(r"^kubernetes/[^/]+/logs/[^/]+$")
+
+# Bump when the meaning of a snapshot field changes; adding or renaming a field changes the hash on its own.
+SNAPSHOT_VERSION = 10
+SNAPSHOT_SUFFIX = ".snapshot"
+
+
+class BundleSnapshot:
+    """Everything the API serves from one bundle, parsed in a single sequential pass over the archive."""
+    def __init__(self, tgz_path):
+        self.tgz_path = tgz_path
+        self.paths = set()
+        self.env_info = {}
+        self.get_outputs = {}     # path -> (names, {name: {column: value}})
+        self.describes = {}       # path -> DescribeOutput, one {section: text} per object in describe order
+        self.manifests = {}       # path -> {"items": [...]} of nodes.json/yaml, NODE_FIELDS only
+        self.pods = {}            # pods.json/yaml path -> [PodRecord], in place of the full manifest
+        self.node_resources = {}  # node name -> allocated resources from describe/nodes.txt
+        self.log_members = []
+        self.relationships = {}   # namespace -> RelationshipGraph, built once every member is parsed
+
+    def merge(self, other):
+        """Adds the parsed members of a partial snapshot built by another ingestion task."""
+        self.paths.update(other.paths)
+        self.env_info = other.env_info or self.env_info
+        self.get_outputs.update(other.get_outputs)
+        self.describes.update(other.describes)
+        self.manifests.update(other.manifests)
+        self.pods.update(other.pods)
+        self.node_resources = other.node_resources or self.node_resources
+        self.log_members.extend(other.log_members)
+
+    def order_members(self, member_paths):
+        """Puts the parsed members back in archive order once the partial snapshots are merged."""
+        positions = {path: position for position, path in enumerate(member_paths)}
+        for parsed in (self.get_outputs, self.describes, self.manifests, self.pods):
+            ordered = sorted(parsed.items(), key=lambda item: positions[item[0]])
+            parsed.clear()
+            parsed.update(ordered)
+
+    def file_exists(self, path):
+        return normalize_member_name(path) in self.paths
+
+    def get_output(self, path):
+        """Returns (names, rows) of a kubectl get output."""
+        get_output = self.get_outputs.get(normalize_member_name(path))
+        if get_output is None:
+            raise FileNotFoundError(f"'{path}' not found in {self.tgz_path}")
+        return get_output
+
+    def get_describe(self, path):
+        describe = self.describes.get(normalize_member_name(path))
+        if describe is None:
+            raise FileNotFoundError(f"'{path}' not found in {self.tgz_path}")
+        return describe
+
+    def get_manifest(self, *paths):
+        """Returns the first of `paths` present in the bundle, so JSON can be preferred over YAML."""
+        for path in paths:
+            manifest = self.manifests.get(normalize_member_name(path))
+            if manifest is not None:
+                return manifest
+        raise FileNotFoundError(f"None of {list(paths)} found in {self.tgz_path}")
+
+    def get_pods(self, *paths):
+        """Returns the pod records of the first of `paths` present in the bundle, like get_manifest."""
+        for path in paths:
+            pods = self.pods.get(normalize_member_name(path))
+            if pods is not None:
+                return pods
+        raise FileNotFoundError(f"None of {list(paths)} found in {self.tgz_path}")
+
+    def get_all_pods(self):
+        """Returns the pod records of every namespace, from pods.json or from pods.yaml when it has no pods.json."""
+        pods = []
+        for path, records in self.pods.items():
+            json_path = json_manifest_path(path)
+            if path == json_path or json_path not in self.pods:
+                pods.extend(records)
+        return pods
+
+    def get_relationships(self, namespace):
+        """Returns the relationship graph of a namespace, empty when the bundle has no pods or PVCs in it."""
+        return self.relationships.get(namespace) or RelationshipGraph()
+
+    def list_get_outputs(self, folder_path):
+        folder_path = normalize_member_name(folder_path)
+        return [path for path in self.get_outputs if path.rpartition("/")[0] == folder_path]
+
+
+def snapshot_schema():
+    fields = sorted(vars(BundleSnapshot("")).keys())
+    return hashlib.sha256(f"{SNAPSHOT_VERSION}:{','.join(fields)}".encode()).hexdigest()
+
+
+def snapshot_path(tgz_path):
+    return artifact_path(f"{bundle_digest(tgz_path)}{SNAPSHOT_SUFFIX}")
+
+
+def save_snapshot(snapshot):
+    """
+    Writes the snapshot under the content hash of its bundle: one JSON header line that
+    identifies the schema and the bundle it was parsed from, followed by the pickled snapshot.
+    """
+    header = json.dumps({
+        "schema": snapshot_schema(),
+        "sha256": bundle_digest(snapshot.tgz_path)
+    }).encode() + b"\n"
+
+    sidecar_path = snapshot_path(snapshot.tgz_path)
+    temp_path = f"{sidecar_path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, "wb") as file_object:
+            file_object.write(header)
+            pickle.dump(snapshot, file_object, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, sidecar_path)
+    except OSError as e:
+        print(f"Error occurred in snapshot > save_snapshot : {e}")
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def load_snapshot(tgz_path):
+    """Reads the saved snapshot of the bundle. Returns None when it is missing, from another schema or not written by this user."""
+    try:
+        digest = bundle_digest(tgz_path)
+        with open(snapshot_path(tgz_path), "rb") as file_object:
+            if not is_own_artifact(file_object):
+                print(f"Error occurred in snapshot > load_snapshot : {file_object.name} is not owned by this user")
+                return None
+            header = json.loads(file_object.readline())
+            if header.get("schema") != snapshot_schema() or header.get("sha256") != digest:
+                return None
+            snapshot = pickle.load(file_object)
+    except (OSError, ValueError, pickle.UnpicklingError, EOFError, AttributeError) as e:
+        if not isinstance(e, FileNotFoundError):
+            print(f"Error occurred in snapshot > load_snapshot : {e}")
+        return None
+
+    snapshot.tgz_path = tgz_path
+    return snapshot
+
+
+def load_or_ingest_bundle(tgz_path, executor=None):
+    """Prefers the on-disk snapshot and only falls back to the tarball when it is missing or stale."""
+    snapshot = load_snapshot(tgz_path)
+    if snapshot is None:
+        snapshot = ingest_bundle(tgz_path, executor)
+        save_snapshot(snapshot)
+    return snapshot
+
+
+def get_resource_type(path):
+    """Returns the group a member is parsed in, or None when the API does not serve it."""
+    if path == ENV_INFO_PATH:
+        return "env"
+    if (GET_OUTPUT_PATTERN.match(path)
+            or DESCRIBE_OUTPUT_PATTERN.match(path)
+            or JSON_MANIFEST_PATTERN.match(path)
+            or YAML_MANIFEST_PATTERN.match(path)):
+        return path.rpartition("/")[2].rpartition(".")[0]
+    return None
+
+
+def add_manifest(snapshot, path, file_object):
+    """
+    Reads the items of a nodes/pods manifest one at a time and only keeps what the API serves:
+    pod records for pods and the projected fields of each node, never the whole document.
+    The manifest is streamed from `file_object` and decoded a chunk at a time rather than into one string.
+    """
+    items = iter_manifest_items(path, file_object)
+    if POD_MANIFEST_PATTERN.match(path):
+        snapshot.pods[path] = build_pod_records(items)
+    else:
+        snapshot.manifests[path] = {"items": [project(item, NODE_FIELDS) for item in items]}
+
+
+def json_manifest_path(path):
+    """The JSON form of a YAML manifest path."""
+    return path.replace("/yaml/", "/json/").replace(".yaml", ".json")
+
+
+def parse_resource_type(members):
+    """
+    Parses every member of one resource type, across all namespaces, into a partial snapshot.
+    Runs in a worker process during ingestion, so it takes the paths of the files the members
+    were spilled to rather than their content, and returns picklable data.
+    """
+    snapshot = BundleSnapshot(None)
+
+    for path, spill_path in members:
+        try:
+            with open(spill_path, "rb") as file_object:
+                if JSON_MANIFEST_PATTERN.match(path) or YAML_MANIFEST_PATTERN.match(path):
+                    add_manifest(snapshot, path, file_object)
+                    continue
+                text = file_object.read().decode("utf-8", errors="replace")
+
+            if path == ENV_INFO_PATH:
+                snapshot.env_info = parse_env_info(text)
+            elif GET_OUTPUT_PATTERN.match(path):
+                snapshot.get_outputs[path] = parse_get_table(text)
+            elif DESCRIBE_OUTPUT_PATTERN.match(path):
+                snapshot.describes[path] = DescribeOutput(text)
+                if path == NODES_DESCRIBE_PATH:
+                    snapshot.node_resources = parse_node_resources(text)
+        except (ValueError, IndexError, KeyError, TypeError, AttributeError, yaml.YAMLError) as e:
+            # One malformed member is left out rather than failing the ingestion of the bundle.
+            print(f"Error occurred in snapshot > parse_resource_type : could not parse '{path}': {e}")
+
+    return snapshot
+
+
+def ingest_bundle(tgz_path, executor=None):
+    """
+    Streams the archive once, front to back, copying every member the API serves to a file of
+    its own, then parses one task per resource type. With a process pool `executor`, the resource
+    types are parsed in parallel and merged into one snapshot. The workers read the members from
+    those files, so no member is held in memory or pickled whole.
+    A YAML manifest is only parsed when the bundle has no JSON form of it.
+    """
+    snapshot = BundleSnapshot(tgz_path)
+    members_by_type = {}
+    member_paths = []
+    member_sizes = {}
+
+    with tempfile.TemporaryDirectory(prefix="ingest-", dir=artifact_dir()) as work_dir:
+        # GzipSeeker also reads bundles made of several gzip members, which tarfile's stream mode stops after the first of.
+        with open(tgz_path, "rb") as file_object, \
+                tarfile.open(fileobj=GzipSeeker(file_object) if is_gzip(tgz_path) else file_object, mode="r|") as tar:
+            for member in tar:
+                path = normalize_member_name(member.name)
+                snapshot.paths.add(path)
+                if not member.isfile():
+                    continue
+
+                if LOG_PATTERN.match(path):
+                    snapshot.log_members.append(path)
+                    continue
+
+                resource_type = get_resource_type(path)
+                if resource_type is None or (YAML_MANIFEST_PATTERN.match(path) and json_manifest_path(path) in member_sizes):
+                    continue
+                spill_path = os.path.join(work_dir, str(len(member_paths)))
+                with open(spill_path, "wb") as spill:
+                    shutil.copyfileobj(tar.extractfile(member), spill, MANIFEST_READ_SIZE)
+                members_by_type.setdefault(resource_type, []).append((path, spill_path))
+                member_paths.append(path)
+                member_sizes[path] = member.size
+
+        # The JSON form of a manifest may also come after its YAML form in the archive.
+        for resource_type, group in members_by_type.items():
+            members_by_type[resource_type] = [(path, spill_path) for path, spill_path in group
+                                              if not (YAML_MANIFEST_PATTERN.match(path) and json_manifest_path(path) in member_sizes)]
+
+        # Largest groups first, so one big describe/pods.txt does not start last and hold up the merge.
+        groups = sorted(members_by_type.values(), key=lambda group: sum(member_sizes[path] for path, _ in group), reverse=True)
+        partials = executor.map(parse_resource_type, groups) if executor else map(parse_resource_type, groups)
+        for partial in partials:
+            snapshot.merge(partial)
+    # Listings such as the available resource types follow the archive, not the parsing order.
+    snapshot.order_members(member_paths)
+    snapshot.relationships = build_relationship_graphs(snapshot)
+
+    return snapshot
+
+
+# Keyed by content hash: the same bundle uploaded under two names is parsed and held once.
+snapshot_registry = BundleRegistry(load_or_ingest_bundle, SNAPSHOT_REGISTRY_SIZE, key_func=bundle_digest)
+
+pinned_snapshots = threading.local()  # per thread: real path -> snapshot of the resource being built
+
+@contextmanager
+def pinned_snapshot(tgz_path, snapshot):
+    """Makes get_snapshot return `snapshot` for the bundle on this thread, even if the registry has evicted it."""
+    if not hasattr(pinned_snapshots, "snapshots"):
+        pinned_snapshots.snapshots = {}
+    pinned = pinned_snapshots.snapshots
+    real_path = os.path.realpath(tgz_path)
+    previous = pinned.get(real_path)
+    pinned[real_path] = snapshot
+    try:
+        yield snapshot
+    finally:
+        if previous is None:
+            pinned.pop(real_path, None)
+        else:
+            pinned[real_path] = previous
+
+def get_snapshot(tgz_path):
+    """Returns the parsed snapshot of the bundle, ingesting it on first use."""
+    pinned = getattr(pinned_snapshots, "snapshots", None)
+    if pinned:
+        snapshot = pinned.get(os.path.realpath(tgz_path))
+        if snapshot is not None:
+            return snapshot
+    return snapshot_registry.get(tgz_path)
@@ -2,74 +2,180 @@
 
 
 import tarfile
+import threading
+
+from utils.conf import TAR_REGISTRY_SIZE
+from utils.tar_index import TarIndex, GzipSeeker
+from utils.bundle_registry import BundleRegistry
+
+
+def normalize_member_name(name):
+    """Drops the leading './' and any trailing '/', so 'kubernetes/x' and './kubernetes/x/' share one key."""
+    while name.startswith("./"):
+        name = name[2:]
+    return name.rstrip("/")
+
 
 class TarController:
-    def __init__(self, tgz_path):
+    def __init__(self, tgz_path, seeker=None):
+        """`seeker` is a GzipSeeker that already read this bundle, e.g. during upload, whose checkpoints are reused."""
         self.tgz_path = tgz_path
-        self.tar = tarfile.open(self.tgz_path, "r:*")
+        self.tar = None
+        self.lock = threading.RLock()
+        self.file_object = open(self.tgz_path, "rb")
+        self.index = TarIndex.load(self.tgz_path)
+        compressed = self.index.compressed if self.index else self.file_object.read(2) == b"\x1f\x8b"
+        if compressed and seeker is not None:
+            seeker.reopen(self.file_object)
+            self.stream = seeker
+        else:
+            self.stream = GzipSeeker(self.file_object) if compressed else self.file_object
+        if self.index is None:
+            self.index = TarIndex.build(self.tgz_path, self.stream)
+            self.index.save()
+        self._build_tree()
+
+    def _build_tree(self):
+        """Builds the normalised path -> archive name map and the directory -> children tree once."""
+        self.paths = {}
+        self.tree = {"": []}
+        for name in self.index.names:
+            path = normalize_member_name(name)
+            if not path or path in self.paths:
+                continue
+            self.paths[path] = name
+
+            if path in self.tree:
+                continue
+            self.tree[path] = []
+
+            # Attach the path to its parent, creating directories the archive has no entry for.
+            child = path
+            while True:
+                parent = child.rpartition("/")[0]
+                known_parent = parent in self.tree
+                self.tree.setdefault(parent, []).append(child)
+                if known_parent:
+                    break
+                child = parent
 
     def __enter__(self):
         """Allows use of 'with TarController(...) as ctrl:'"""
-        self.tar = tarfile.open(self.tgz_path, "r:gz")
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        if self.tar:
-            self.tar.close()
-    
+        self.close()
+
+    def close(self):
+        with self.lock:
+            if self.tar:
+                self.tar.close()
+                self.tar = None
+            self.file_object.close()
+
+    def _ensure_open(self):
+        # A controller evicted from the registry may still be held by an in-flight request.
+        if self.file_object.closed:
+            self.file_object = open(self.tgz_path, "rb")
+            if isinstance(self.stream, GzipSeeker):
+                self.stream.reopen(self.file_object)
+            else:
+                self.stream = self.file_object
+
     def file_exists_in_tar(self, file_to_find):
-        if file_to_find in self.tar.getnames():
-            return True
-        return False
+        return normalize_member_name(file_to_find) in self.paths
 
-    def list_files_in_dir(self, folder_path=""):
+    def list_files_in_dir(self, folder_path="", recursive=True):
         """Lists files inside a specific folder within the archive."""
-        # 1. Get all paths from the tarball
-        if not self.file_exists_in_tar(folder_path):
-            folder_path = folder_path.replace("./", "")
-        if not self.tar:
-            with tarfile.open(self.tgz_path, "r:gz") as tar:
-                all_names = tar.getnames()
-        else:
-            all_names = self.tar.getnames()
-
-        # 2. If no folder_path is provided, return everything
-        if not folder_path:
-            return all_names
-
-        # 3. Filter names that start with the folder_path
-        # We ensure folder_path ends with '/' to avoid matching 'folder_backup' when looking for 'folder'
-        search_prefix = folder_path.strip("/") + "/"
-        
-        contents = [
-            name for name in all_names 
-            if name.startswith(search_prefix) and name != search_prefix
-        ]
-        
+        folder_path = normalize_member_name(folder_path)
+        if folder_path not in self.tree:
+            return []
+
+        if not folder_path and recursive:
+            return self.index.names
+
+        contents = []
+        pending = list(reversed(self.tree[folder_path]))
+        while pending:
+            path = pending.pop()
+            if path in self.paths:
+                contents.append(self.paths[path])
+            if recursive:
+                pending.extend(reversed(self.tree[path]))
+
         return contents
-    
+
+    def in_archive_order(self, internal_paths):
+        """
+        Sorts member paths by where their data starts in the archive, so reading them one after
+        the other never seeks backwards, which would inflate the stream again from a checkpoint.
+        """
+        def archive_offset(internal_path):
+            member = self.index.members.get(self.paths.get(normalize_member_name(internal_path)))
+            return (0, member[0]) if member else (1, 0)
+        return sorted(internal_paths, key=archive_offset)
+
+    def get_file_size(self, internal_path):
+        """Returns the size of a member in bytes, or None when it is not in the archive."""
+        name = self.paths.get(normalize_member_name(internal_path))
+        if name is None:
+            return None
+        if name in self.index.members:
+            return self.index.members[name][1]
+        content = self.get_file_content(internal_path, as_text=False)
+        return len(content) if content is not None else None
+
+    def read_file_range(self, internal_path, start, length):
+        """Reads `length` bytes of a member from `start` without reading the rest of it."""
+        name = self.paths.get(normalize_member_name(internal_path))
+        if name is None or name not in self.index.members:
+            content = self.get_file_content(internal_path, as_text=False)
+            return content[start:start + length] if content is not None else None
+
+        offset, size = self.index.members[name]
+        start = min(max(start, 0), size)
+        with self.lock:
+            self._ensure_open()
+            self.stream.seek(offset + start)
+            return self.stream.read(min(length, size - start))
+
     def get_file_content(self, internal_path, as_text=True):
         """
         Reads any file's content.
         :param as_text: If True, returns a string (UTF-8). If False, returns raw bytes.
         """
-        if not self.file_exists_in_tar(internal_path):
-            internal_path = internal_path.replace("./", "")
-        opened_locally = False
-        if not self.tar:
-            self.tar = tarfile.open(self.tgz_path, "r:gz")
-            opened_locally = True
-
-        try:
-            file_obj = self.tar.extractfile(internal_path)
-            if file_obj:
-                content = file_obj.read()
-                return content.decode('utf-8') if as_text else content
-            return None
-        except KeyError:
+        name = self.paths.get(normalize_member_name(internal_path))
+        if name is None:
             print(f"File '{internal_path}' not found.")
             return None
-        finally:
-            if opened_locally:
-                self.tar.close()
-                self.tar = None
\ No newline at end of file
+
+        if name in self.index.members:
+            # Regular files are read straight from their indexed offset.
+            offset, size = self.index.members[name]
+            with self.lock:
+                self._ensure_open()
+                self.stream.seek(offset)
+                content = self.stream.read(size)
+            return content.decode('utf-8') if as_text else content
+
+        # Links and other special members are resolved by tarfile.
+        with self.lock:
+            if not self.tar:
+                self.tar = tarfile.open(self.tgz_path, "r:*")
+
+            try:
+                file_obj = self.tar.extractfile(name)
+                if file_obj:
+                    content = file_obj.read()
+                    return content.decode('utf-8') if as_text else content
+                return None
+            except KeyError:
+                print(f"File '{internal_path}' not found.")
+                return None
+
+
+tar_registry = BundleRegistry(TarController, TAR_REGISTRY_SIZE, on_evict=TarController.close)
+
+def get_tar_controller(tgz_path):
+    """Returns the shared TarController of the bundle, opening it on first use."""
+    return tar_registry.get(tgz_path)
@@ -0,0 +1,301 @@
+# tar_index.py
+
+import os
+import io
+import json
+import zlib
+import queue
+import bisect
+import tarfile
+import threading
+
+from utils.conf import GZIP_CHECKPOINT_SPAN
+from utils.bundle_registry import artifact_path, bundle_digest
+
+INDEX_VERSION = 1
+INDEX_SUFFIX = ".idx.json"
+READ_SIZE = 1024 * 64
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+def is_gzip(path):
+    with open(path, "rb") as file_object:
+        return file_object.read(2) == GZIP_MAGIC
+
+
+class GzipSeeker(io.RawIOBase):
+    """
+    Seekable, read-only view of the decompressed bytes of a gzip file.
+    While reading forward it keeps a copy of the decompressor state every `span` bytes,
+    so a later seek restarts from the closest checkpoint instead of the start of the stream.
+    """
+    def __init__(self, fileobj, span=GZIP_CHECKPOINT_SPAN):
+        self.fileobj = fileobj
+        self.span = span
+        self.checkpoints = []  # (uncompressed offset, compressed offset, decompressor), sorted
+        self.checkpoint_offsets = []
+        self.pos = 0
+        self._restart(0, 0, None)
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            self.pos = offset
+        elif whence == io.SEEK_CUR:
+            self.pos += offset
+        else:
+            raise io.UnsupportedOperation("GzipSeeker cannot seek relative to the end of the stream")
+        return self.pos
+
+    def read(self, size=-1):
+        self._move_to(self.pos)
+        chunks = []
+        remaining = size
+        while remaining != 0:
+            start = self.pos - self._buffer_start
+            if start < len(self._buffer):
+                end = len(self._buffer) if remaining < 0 else min(len(self._buffer), start + remaining)
+                chunks.append(self._buffer[start:end])
+                self.pos += end - start
+                if remaining > 0:
+                    remaining -= end - start
+            elif not self._inflate():
+                break
+        return b"".join(chunks)
+
+    def reopen(self, fileobj):
+        """Continues on a new handle of the same file, keeping the checkpoints already recorded."""
+        self.fileobj = fileobj
+        self._restart(0, 0, None)
+
+    def _move_to(self, pos):
+        """Restarts from the nearest checkpoint when `pos` is behind the buffer or a checkpoint is closer than the current state."""
+        i = bisect.bisect_right(self.checkpoint_offsets, pos) - 1
+        checkpoint = self.checkpoints[i] if i >= 0 else (0, 0, None)
+        if pos < self._buffer_start or checkpoint[0] > self._out_pos:
+            self._restart(*checkpoint)
+
+    def _restart(self, out_pos, raw_pos, decompressor):
+        self.fileobj.seek(raw_pos)
+        self._raw_pos = raw_pos
+        self._out_pos = out_pos
+        self._buffer = b""
+        self._buffer_start = out_pos
+        self._decompressor = decompressor.copy() if decompressor else None
+
+    def _inflate(self):
+        """Decompresses the next chunk of the file into the buffer. Returns False at the end of the stream."""
+        data = b""
+        while not data:
+            raw = self.fileobj.read(READ_SIZE)
+            if not raw:
+                return False
+            self._raw_pos += len(raw)
+            data = self._decompress(raw)
+
+        self._buffer_start = self._out_pos
+        self._buffer = data
+        self._out_pos += len(data)
+
+        last_checkpoint = self.checkpoint_offsets[-1] if self.checkpoint_offsets else 0
+        if self._decompressor and self._out_pos >= last_checkpoint + self.span:
+            self.checkpoints.append((self._out_pos, self._raw_pos, self._decompressor.copy()))
+            self.checkpoint_offsets.append(self._out_pos)
+        return True
+
+    def _decompress(self, raw):
+        # A bundle may be several gzip members back to back, possibly followed by zero padding.
+        output = []
+        while raw:
+            if self._decompressor is None:
+                raw = raw.lstrip(b"\x00")
+                if not raw:
+                    break
+                self._decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+            output.append(self._decompressor.decompress(raw))
+            if not self._decompressor.eof:
+                break
+            raw = self._decompressor.unused_data
+            self._decompressor = None
+        return b"".join(output)
+
+
+def read_members(tar):
+    """Returns every member name in archive order and the (offset, size) of each regular file."""
+    names = []
+    members = {}
+    for member in tar:
+        names.append(member.name)
+        if member.isfile():
+            members[member.name] = (member.offset_data, member.size)
+    return names, members
+
+
+class ChunkReader(io.RawIOBase):
+    """Blocking, forward-only file object over chunks handed over by another thread."""
+    def __init__(self, max_chunks=8):
+        self.chunks = queue.Queue(max_chunks)
+        self.buffer = bytearray()
+        self.pos = 0
+        self.finished = False
+
+    def readable(self):
+        return True
+
+    def feed(self, chunk):
+        self.chunks.put(chunk)
+
+    def finish(self):
+        self.chunks.put(None)
+
+    def tell(self):
+        return self.pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence != io.SEEK_SET or offset != self.pos:
+            raise io.UnsupportedOperation("ChunkReader can only be read forward")
+        return self.pos
+
+    def read(self, size=-1):
+        while not self.finished and (size < 0 or len(self.buffer) < size):
+            chunk = self.chunks.get()
+            if chunk is None:
+                self.finished = True
+            else:
+                self.buffer += chunk
+
+        size = len(self.buffer) if size < 0 else min(size, len(self.buffer))
+        data = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        self.pos += size
+        return data
+
+    def drain(self):
+        """Discards everything until the end of the input, so the feeding thread never blocks."""
+        self.buffer.clear()
+        while not self.finished:
+            if self.chunks.get() is None:
+                self.finished = True
+
+
+class StreamingIndexBuilder(threading.Thread):
+    """
+    Builds the member index of a bundle from its raw bytes as they arrive, in a background thread.
+    The GzipSeeker it reads through keeps its checkpoints and can be moved onto the saved file afterwards.
+    """
+    def __init__(self, compressed):
+        super().__init__(daemon=True)
+        self.compressed = compressed
+        self.reader = ChunkReader()
+        self.stream = GzipSeeker(self.reader) if compressed else self.reader
+        self.names = []
+        self.members = {}
+        self.error = None
+
+    def feed(self, chunk):
+        self.reader.feed(chunk)
+
+    def finish(self):
+        self.reader.finish()
+
+    def run(self):
+        try:
+            with tarfile.open(fileobj=self.stream, mode="r|") as tar:
+                self.names, self.members = read_members(tar)
+        except (tarfile.TarError, zlib.error, EOFError, OSError) as e:
+            self.error = e
+        finally:
+            self.reader.drain()
+
+    def build_index(self, tgz_path):
+        return TarIndex(tgz_path, self.compressed, self.names, self.members)
+
+
+class TarIndex:
+    """
+    Maps every member of a bundle to the (offset, size) of its data in the uncompressed tar stream,
+    so a member can be read with one seek instead of walking the archive from the start.
+    Saved under the content hash of the bundle, so identical uploads share one index.
+    """
+    def __init__(self, tgz_path, compressed, names, members, digest=None):
+        self.tgz_path = tgz_path
+        self.compressed = compressed
+        self.names = names
+        self.members = members
+        self.digest = digest or bundle_digest(tgz_path)
+
+    @staticmethod
+    def index_path(tgz_path):
+        return artifact_path(f"{bundle_digest(tgz_path)}{INDEX_SUFFIX}")
+
+    @classmethod
+    def build(cls, tgz_path, stream=None):
+        """
+        Walks the archive headers once. When `stream` is a GzipSeeker, the checkpoints
+        recorded during the walk stay on it and make later reads cheap.
+        """
+        compressed = is_gzip(tgz_path)
+        file_object = None
+        if stream is None:
+            file_object = open(tgz_path, "rb")
+            stream = GzipSeeker(file_object) if compressed else file_object
+
+        try:
+            stream.seek(0)
+            with tarfile.open(fileobj=stream, mode="r:") as tar:
+                names, members = read_members(tar)
+        finally:
+            if file_object:
+                file_object.close()
+
+        return cls(tgz_path, compressed, names, members)
+
+    @classmethod
+    def load(cls, tgz_path):
+        """Returns the saved index of the bundle, or None when it is missing or from another format."""
+        try:
+            digest = bundle_digest(tgz_path)
+            with open(cls.index_path(tgz_path), "r") as file_object:
+                saved = json.load(file_object)
+        except (OSError, ValueError):
+            return None
+
+        if saved.get("version") != INDEX_VERSION or saved.get("sha256") != digest:
+            return None
+
+        members = {name: tuple(member) for name, member in saved["members"].items()}
+        return cls(tgz_path, saved["compressed"], saved["names"], members, digest)
+
+    def save(self):
+        index_path = artifact_path(f"{self.digest}{INDEX_SUFFIX}")
+        temp_path = f"{index_path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, "w") as file_object:
+                json.dump({
+                    "version": INDEX_VERSION,
+                    "sha256": self.digest,
+                    "compressed": self.compressed,
+                    "names": self.names,
+                    "members": self.members
+                }, file_object)
+            os.replace(temp_path, index_path)
+        except OSError as e:
+            print(f"Error occurred in TarIndex > save : {e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    @classmethod
+    def load_or_build(cls, tgz_path, stream=None):
+        index = cls.load(tgz_path)
+        if index is None:
+            index = cls.build(tgz_path, stream)
+            index.save()
+        return index
@@ -0,0 +1,126 @@
+# warmup.py
+
+import os
+import time
+import orjson
+import asyncio
+
+from fastapi import Response
+
+from routers import env, node, pod, pvc, resources
+from utils.conf import WARMUP_JOB_TTL
+
+# Endpoints the dashboard calls as soon as a bundle is opened, in the order the pages load them.
+DASHBOARD_ENDPOINTS = [
+    env.get_env_info_dict,
+    node.get_node_status,
+    pod.get_pods_by_workload_class,
+    resources.get_available_resource_types,
+    node.get_node_names,
+    node.get_nodes,
+    node.get_node_describe,
+    pod.get_pod_containers,
+    pvc.get_pv_describe,
+]
+# Called once per available resource type for the components pages.
+COMPONENT_ENDPOINTS = [
+    resources.get_resource_status,
+    resources.get_resource_describe,
+]
+
+warmup_jobs = {}  # job id (sha256 of the bundle) -> WarmupJob
+
+
+class WarmupJob:
+    """Fills the response cache of one uploaded bundle in the background and records its progress."""
+    def __init__(self, job_id, file_location):
+        self.job_id = job_id
+        self.file_location = file_location
+        self.state = "pending"
+        self.total = len(DASHBOARD_ENDPOINTS)
+        self.completed = 0
+        self.failed = []
+        self.started_at = time.time()
+        self.finished_at = None
+        self.task = None
+
+    def status(self):
+        return {
+            "job_id": self.job_id,
+            "file_location": self.file_location,
+            "state": self.state,
+            "total": self.total,
+            "completed": self.completed,
+            "failed": self.failed,
+            "duration_seconds": round((self.finished_at or time.time()) - self.started_at, 4)
+        }
+
+    async def call(self, endpoint, **kwargs):
+        """Calls a cached endpoint directly, which stores its response like a request would."""
+        try:
+            result = await endpoint(file_name=self.file_location, **kwargs)
+        except Exception as e:
+            print(f"Error occurred in WarmupJob > call : {endpoint.__name__}({kwargs}): {e}")
+            self.failed.append({"endpoint": endpoint.__name__, **kwargs, "error": str(e)})
+            result = None
+        self.completed += 1
+        return result
+
+    async def run(self):
+        self.state = "running"
+        try:
+            resource_types = []
+            for endpoint in DASHBOARD_ENDPOINTS:
+                result = await self.call(endpoint)
+                if endpoint is resources.get_available_resource_types and result:
+                    resource_types = orjson.loads(result.body) if isinstance(result, Response) else result
+                    self.total += len(resource_types) * len(COMPONENT_ENDPOINTS)
+
+            for resource_name in resource_types:
+                for endpoint in COMPONENT_ENDPOINTS:
+                    await self.call(endpoint, resource_name=resource_name)
+
+            self.state = "done" if not self.failed else "failed"
+        except asyncio.CancelledError:
+            self.state = "cancelled"
+            raise
+        finally:
+            self.finished_at = time.time()
+
+
+def prune_warmup_jobs():
+    """Forgets the jobs that finished more than WARMUP_JOB_TTL seconds ago."""
+    expired_before = time.time() - WARMUP_JOB_TTL
+    for job_id, job in list(warmup_jobs.items()):
+        if job.finished_at is not None and job.finished_at < expired_before:
+            del warmup_jobs[job_id]
+
+
+def start_warmup(file_location, job_id):
+    """Starts warming the cache of an uploaded bundle, unless the same content is already being warmed."""
+    prune_warmup_jobs()
+    job = warmup_jobs.get(job_id)
+    if job is not None and job.state in ("pending", "running") and job.file_location == file_location:
+        return job
+
+    job = WarmupJob(job_id, file_location)
+    warmup_jobs[job_id] = job
+    job.task = asyncio.create_task(job.run())
+    return job
+
+
+def get_warmup_status(job_id):
+    prune_warmup_jobs()
+    job = warmup_jobs.get(job_id)
+    assert job is not None, f"Warm-up job '{job_id}' not found."
+    return job.status()
+
+
+def cancel_warmup(file_location):
+    """Stops and forgets the warm-up of a bundle that is being deleted."""
+    file_location = os.path.realpath(file_location)
+    for job_id, job in list(warmup_jobs.items()):
+        if os.path.realpath(job.file_location) == file_location:
+            if job.task and not job.task.done():
+                job.task.cancel()
+            del warmup_jobs[job_id]